@@ -0,0 +1,111 @@
+"""Admission control for live crawls (process local).
+
+Key design:
+ - At most ADMISSION_MAX_ACTIVE crawls run at once (each one holds browser
+   pages plus detail workers; more than a couple OOM a 2 GB box)
+ - Up to ADMISSION_MAX_QUEUE more wait FIFO for a slot, each for at most
+   ADMISSION_QUEUE_TIMEOUT_SEC; beyond that, callers get Overloaded right
+   away with a Retry-After estimate instead of piling up
+ - Retry-After is derived from a moving average of crawl duration and the
+   current backlog
+ - stats() exposes active/waiting counts, wait times and rejections
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import tracing
+
+ADMISSION_MAX_ACTIVE = max(1, int(os.getenv("ADMISSION_MAX_ACTIVE", "2")))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "8"))
+ADMISSION_QUEUE_TIMEOUT_SEC = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SEC", "10"))
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"scrape capacity saturated ({reason}), retry in {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+_STATS: Dict[str, Any] = {
+    "admitted": 0,
+    "rejected_queue_full": 0,
+    "rejected_timeout": 0,
+    "waited": 0,
+    "wait_ms_total": 0.0,
+    "wait_ms_max": 0.0,
+    "avg_run_sec": 20.0,  # EWMA seed until the first crawls finish
+}
+_state = {"active": 0, "waiting": 0}
+_sem: Optional[asyncio.Semaphore] = None
+
+
+def _semaphore() -> asyncio.Semaphore:
+    global _sem
+    if _sem is None:
+        _sem = asyncio.Semaphore(ADMISSION_MAX_ACTIVE)
+    return _sem
+
+
+def retry_after() -> float:
+    """Rough seconds until a new request would get a slot."""
+    backlog = _state["active"] + _state["waiting"]
+    rounds = max(1, math.ceil(backlog / ADMISSION_MAX_ACTIVE))
+    return max(1.0, rounds * _STATS["avg_run_sec"])
+
+
+@asynccontextmanager
+async def slot() -> AsyncIterator[None]:
+    """Hold one crawl slot for the block; raises Overloaded when saturated."""
+    sem = _semaphore()
+    if sem.locked() or _state["waiting"]:
+        if _state["waiting"] >= ADMISSION_MAX_QUEUE:
+            _STATS["rejected_queue_full"] += 1
+            raise Overloaded("queue_full", retry_after())
+        _state["waiting"] += 1
+        t0 = time.monotonic()
+        try:
+            with tracing.span("admission.wait", waiting=_state["waiting"]):
+                await asyncio.wait_for(sem.acquire(), timeout=ADMISSION_QUEUE_TIMEOUT_SEC)
+        except asyncio.TimeoutError:
+            _STATS["rejected_timeout"] += 1
+            raise Overloaded("timeout", retry_after())
+        finally:
+            _state["waiting"] -= 1
+        waited = (time.monotonic() - t0) * 1000
+        _STATS["waited"] += 1
+        _STATS["wait_ms_total"] += waited
+        _STATS["wait_ms_max"] = max(_STATS["wait_ms_max"], waited)
+    else:
+        await sem.acquire()
+    _STATS["admitted"] += 1
+    _state["active"] += 1
+    t_run = time.monotonic()
+    try:
+        yield
+    finally:
+        _state["active"] -= 1
+        sem.release()
+        _STATS["avg_run_sec"] = 0.8 * _STATS["avg_run_sec"] + 0.2 * (time.monotonic() - t_run)
+
+
+def stats() -> Dict[str, Any]:
+    waited = _STATS["waited"]
+    return {
+        "max_active": ADMISSION_MAX_ACTIVE,
+        "max_queue": ADMISSION_MAX_QUEUE,
+        "active": _state["active"],
+        "waiting": _state["waiting"],
+        "admitted": _STATS["admitted"],
+        "rejected_queue_full": _STATS["rejected_queue_full"],
+        "rejected_timeout": _STATS["rejected_timeout"],
+        "avg_wait_ms": round(_STATS["wait_ms_total"] / waited, 1) if waited else 0.0,
+        "max_wait_ms": round(_STATS["wait_ms_max"], 1),
+        "avg_run_sec": round(_STATS["avg_run_sec"], 1),
+    }
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: per-element DOM extraction vs. one batched page.evaluate.
+
+Renders a synthetic listing page (cards + navigation anchors) with
+page.set_content, then times the legacy query_selector_all/inner_text/
+get_attribute loops against scrapers.extract. Playwright protocol round-trips
+are counted by wrapping Channel.inner_send, so no network is needed.
+
+Usage:
+    python benchmarks/bench_extract.py [--cards 40] [--anchors 200] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playwright._impl._connection import Channel
+from playwright.async_api import Page, async_playwright
+
+from scrapers.coptic import CARD_SELECTORS
+from scrapers.extract import extract_anchors, extract_cards
+
+_CALLS = {"n": 0}
+_orig_inner_send = Channel.inner_send
+
+
+async def _counting_inner_send(self, *args, **kwargs):
+    _CALLS["n"] += 1
+    return await _orig_inner_send(self, *args, **kwargs)
+
+
+Channel.inner_send = _counting_inner_send  # type: ignore[assignment]
+
+
+def build_html(cards: int, anchors: int) -> str:
+    parts = ["<html><body><nav>"]
+    parts += [f'<a href="/page/{i}/">رابط {i}</a>' for i in range(anchors)]
+    parts.append("</nav><main>")
+    parts += [
+        f'<article><a href="/books/{i}/">كتاب رقم {i}</a><img src="/covers/{i}.jpg"></article>'
+        for i in range(cards)
+    ]
+    parts.append("</main></body></html>")
+    return "".join(parts)
+
+
+async def legacy_cards(page: Page) -> List[Tuple[str, str, str]]:
+    # previous scrapers/coptic._extract_page_cards body (one IPC per call)
+    for sel in CARD_SELECTORS:
+        els = await page.query_selector_all(sel)
+        if els:
+            out = []
+            for el in els:
+                a = await el.query_selector("a")
+                if not a:
+                    continue
+                title = (await a.inner_text() or "").strip()
+                href = await a.get_attribute("href") or ""
+                if not title or not href:
+                    continue
+                img = await el.query_selector("img")
+                cover = ""
+                if img:
+                    cover = await img.get_attribute("src") or ""
+                out.append((title, href, cover))
+            if out:
+                return out
+    return []
+
+
+async def legacy_anchors(page: Page) -> List[Tuple[str, str]]:
+    # previous scrapers/christianlib listing loop
+    out = []
+    for a in await page.query_selector_all("a"):
+        out.append(((await a.inner_text() or "").strip(), await a.get_attribute("href") or ""))
+    return out
+
+
+async def measure(fn: Callable[[Page], Awaitable[list]], page: Page, repeat: int) -> Dict[str, float]:
+    rows = await fn(page)  # warm-up, also sanity output
+    calls0, t0 = _CALLS["n"], time.perf_counter()
+    for _ in range(repeat):
+        await fn(page)
+    took = (time.perf_counter() - t0) / repeat
+    return {"rows": len(rows), "ipc": (_CALLS["n"] - calls0) / repeat, "ms": took * 1000}
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--cards", type=int, default=40)
+    ap.add_argument("--anchors", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(build_html(args.cards, args.anchors))
+        cases = [
+            ("cards/legacy", legacy_cards),
+            ("cards/evaluate", lambda p: extract_cards(p, CARD_SELECTORS)),
+            ("anchors/legacy", legacy_anchors),
+            ("anchors/evaluate", extract_anchors),
+        ]
+        print(f"{'case':<18}{'rows':>6}{'ipc/page':>10}{'ms/page':>10}")
+        for name, fn in cases:
+            r = await measure(fn, page, args.repeat)
+            print(f"{name:<18}{r['rows']:>6}{r['ipc']:>10.0f}{r['ms']:>10.1f}")
+        await browser.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""Offline end-to-end scraper benchmark over recorded HTML fixtures.
+
+Replays listing / details pages from benchmarks/fixtures (routes.json maps
+URL regexes to files) instead of hitting coptic-treasures.com and
+christianlib.com:
+
+  playwright  scrapers.coptic.scrape / scrapers.christianlib.scrape on a real
+              Chromium page; the fixture server is a context.route handler
+              registered under page_policy's block policy, so blocked
+              resources are aborted exactly as in production
+  http        the scraper/ BeautifulSoup classes with their httpx client
+              swapped for an httpx.MockTransport over the same fixtures
+
+robots.txt is served from the fixtures too and the per-host scheduler is set
+to no spacing, so nothing leaves the machine and runs are repeatable.
+
+Per case it reports items, navigations (document fetches reaching the
+fixture server), wall time, CPU of this process and of the whole process
+tree (Chromium included), and peak RSS of the tree sampled every
+--sample-ms. Item and navigation counts are fixed by the fixtures and
+checked against each case's expectation; --baseline compares wall time with
+a previous --json run. Any mismatch or regression exits with status 1.
+
+Usage:
+    python benchmarks/bench_scrapers.py [--only playwright|http] [--repeat 3]
+                                        [--json out.json] [--baseline old.json --tolerance 0.25]
+                                        [--executable-path /path/to/chrome]
+"""
+from __future__ import annotations
+
+import os
+
+os.environ.setdefault("HOSTRATE_MIN_INTERVAL_SEC", "0")  # before hostrate is imported
+
+import argparse
+import asyncio
+import json
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(BACKEND.parent))  # backend.scraper uses package-relative imports
+
+import httpx
+from playwright.async_api import Browser, Route, async_playwright
+
+import page_policy
+import robots
+from backend.scraper.base import ValidatorStore
+from backend.scraper.christianlib import ChristianLibScraper
+from backend.scraper.coptic_treasures import CopticTreasuresScraper
+from scrapers import christianlib, coptic
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".txt": "text/plain; charset=utf-8",
+    ".js": "application/javascript",
+}
+
+
+class Fixtures:
+    """URL -> recorded response, shared by the Playwright route and httpx transport."""
+
+    def __init__(self, root: Path = FIXTURES):
+        manifest = json.loads((root / "routes.json").read_text(encoding="utf-8"))
+        self.routes = [(re.compile(r["url"]), root / r["file"]) for r in manifest["routes"]]
+        self.navs = 0
+        self.misses: List[str] = []
+
+    def resolve(self, url: str) -> Tuple[int, str, bytes]:
+        for rx, path in self.routes:
+            m = rx.search(url)
+            if m:
+                body = path.read_text(encoding="utf-8")
+                for name, value in m.groupdict().items():
+                    body = body.replace("{" + name + "}", value or "")
+                return 200, CONTENT_TYPES.get(path.suffix, "application/octet-stream"), body.encode("utf-8")
+        self.misses.append(url)
+        return 404, "text/plain", b"not recorded"
+
+    async def route(self, route: Route) -> None:
+        req = route.request
+        if req.resource_type == "document":
+            self.navs += 1
+        status, ctype, body = self.resolve(req.url)
+        await route.fulfill(status=status, content_type=ctype, body=body)
+
+    def transport(self, count: bool = True) -> httpx.MockTransport:
+        def handler(request: httpx.Request) -> httpx.Response:
+            url = str(request.url)
+            if count and not url.endswith("/robots.txt"):
+                self.navs += 1
+            status, ctype, body = self.resolve(url)
+            return httpx.Response(status, headers={"content-type": ctype}, content=body)
+
+        return httpx.MockTransport(handler)
+
+
+def _proc_tree() -> Optional[Tuple[int, float]]:
+    """(RSS bytes, CPU seconds) of this process and its descendants, from /proc.
+
+    CPU includes reaped children (cutime/cstime), so Chromium renderers that
+    exit mid-run are not subtracted from the total.
+    """
+    try:
+        pids = [int(p) for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return None
+    tick, page = os.sysconf("SC_CLK_TCK"), os.sysconf("SC_PAGE_SIZE")
+    info: Dict[int, Tuple[int, int, float]] = {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                rest = f.read().rsplit(b")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        # fields after "comm)": state ppid ... utime(11) stime(12) cutime(13) cstime(14) ... rss(21)
+        info[pid] = (int(rest[1]), int(rest[21]) * page, sum(int(x) for x in rest[11:15]) / tick)
+    tree, frontier = {os.getpid()}, [os.getpid()]
+    while frontier:
+        parent = frontier.pop()
+        for pid, (ppid, _, _) in info.items():
+            if ppid == parent and pid not in tree:
+                tree.add(pid)
+                frontier.append(pid)
+    return sum(info[p][1] for p in tree if p in info), sum(info[p][2] for p in tree if p in info)
+
+
+class Probe:
+    """Wall / CPU / peak RSS for one run; RSS is sampled in the background."""
+
+    def __init__(self, sample_ms: int):
+        self.sample_sec = sample_ms / 1000
+        self.peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _sample(self) -> Optional[Tuple[int, float]]:
+        snap = _proc_tree()
+        if snap:
+            self.peak_rss = max(self.peak_rss, snap[0])
+        return snap
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sample_sec)
+            self._sample()
+
+    async def __aenter__(self) -> "Probe":
+        snap = self._sample()
+        self._tree_cpu0 = snap[1] if snap else None
+        self._cpu0, self._t0 = time.process_time(), time.perf_counter()
+        self._task = asyncio.create_task(self._loop())
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self.wall = time.perf_counter() - self._t0
+        self.cpu = time.process_time() - self._cpu0
+        self._task.cancel()
+        snap = self._sample()
+        # a child that exits before its parent reaps it can still dip the sum
+        self.tree_cpu = max(0.0, snap[1] - self._tree_cpu0) if snap and self._tree_cpu0 is not None else None
+        if not snap:  # no /proc: lifetime peak of this process only
+            self.peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Case:
+    def __init__(self, name: str, kind: str, run: Callable[[Any], Awaitable[list]], items: int, navs: int):
+        self.name = name
+        self.kind = kind  # "playwright": run(page), "http": run(tmpdir) builds its own scraper
+        self.run = run
+        self.items = items
+        self.navs = navs
+
+
+async def _http_scraper(scraper, fx: Fixtures, tmp: str, call: Callable[[Any], Awaitable[list]]) -> list:
+    scraper.validators = ValidatorStore(os.path.join(tmp, "validators"))
+    scraper.http = httpx.AsyncClient(transport=fx.transport(), follow_redirects=True)
+    try:
+        return await call(scraper)
+    finally:
+        await scraper.cleanup()
+
+
+def cases(fx: Fixtures) -> List[Case]:
+    return [
+        Case("coptic/all", "playwright", lambda p: coptic.scrape(p, None, 2, []), items=12, navs=14),
+        Case("coptic/q", "playwright", lambda p: coptic.scrape(p, "القداس", 2, []), items=2, navs=3),
+        Case("christianlib/all", "playwright", lambda p: christianlib.scrape(p, None, 1, [], 20), items=12, navs=1),
+        Case("christianlib/deep", "playwright", lambda p: christianlib.scrape(p, "اثناسيوس", 1, [], 5), items=1, navs=6),
+        Case(
+            "coptic_treasures/bs4", "http",
+            lambda tmp: _http_scraper(
+                CopticTreasuresScraper(state_path=os.path.join(tmp, "state.json")), fx, tmp,
+                lambda s: s.search_books("القداس"),
+            ),
+            items=2, navs=14,
+        ),
+        Case(
+            "christianlib/bs4", "http",
+            lambda tmp: _http_scraper(ChristianLibScraper(), fx, tmp, lambda s: s.search_books("اثناسيوس")),
+            items=6, navs=7,
+        ),
+    ]
+
+
+async def run_case(case: Case, fx: Fixtures, browser: Optional[Browser], sample_ms: int) -> Dict[str, Any]:
+    fx.navs, fx.misses = 0, []
+    robots._CACHE.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        if case.kind == "playwright":
+            context = await browser.new_context()
+            # routes run newest first: the block policy decides, then falls back to the fixtures
+            await context.route("**/*", fx.route)
+            await page_policy.install(context)
+            page = await context.new_page()
+            try:
+                async with Probe(sample_ms) as probe:
+                    items = await case.run(page)
+            finally:
+                await context.close()
+        else:
+            async with Probe(sample_ms) as probe:
+                items = await case.run(tmp)
+    return {
+        "case": case.name,
+        "items": len(items),
+        "navs": fx.navs,
+        "wall_ms": round(probe.wall * 1000, 1),
+        "cpu_ms": round(probe.cpu * 1000, 1),
+        "tree_cpu_ms": round(probe.tree_cpu * 1000, 1) if probe.tree_cpu is not None else None,
+        "peak_rss_mb": round(probe.peak_rss / 2**20, 1),
+        "misses": sorted(set(fx.misses)),
+    }
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median timings over repeats; counts from the last run; worst peak RSS."""
+    out = dict(runs[-1])
+    for key in ("wall_ms", "cpu_ms", "tree_cpu_ms"):
+        vals = [r[key] for r in runs if r[key] is not None]
+        out[key] = round(statistics.median(vals), 1) if vals else None
+    out["peak_rss_mb"] = max(r["peak_rss_mb"] for r in runs)
+    return out
+
+
+def check(results: List[Dict[str, Any]], expected: Dict[str, Case], baseline: Optional[Dict[str, Any]], tolerance: float) -> List[str]:
+    problems = []
+    base = {r["case"]: r for r in (baseline or {}).get("cases", [])}
+    for r in results:
+        case = expected[r["case"]]
+        if r["items"] != case.items:
+            problems.append(f"{r['case']}: {r['items']} items, expected {case.items}")
+        if r["navs"] != case.navs:
+            problems.append(f"{r['case']}: {r['navs']} navigations, expected {case.navs}")
+        old = base.get(r["case"])
+        if old and old.get("wall_ms") and r["wall_ms"] > old["wall_ms"] * (1 + tolerance):
+            problems.append(f"{r['case']}: wall {r['wall_ms']:.0f}ms vs baseline {old['wall_ms']:.0f}ms")
+    return problems
+
+
+async def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--only", choices=("playwright", "http"))
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--sample-ms", type=int, default=50)
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--baseline", help="results JSON of a previous run to compare wall time against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed wall time growth vs baseline")
+    ap.add_argument("--executable-path", help="Chromium/Chrome binary to use instead of Playwright's bundled one")
+    args = ap.parse_args()
+
+    fx = Fixtures()
+    robots._client = httpx.AsyncClient(transport=fx.transport(count=False))
+    selected = [c for c in cases(fx) if args.only in (None, c.kind)]
+    results: List[Dict[str, Any]] = []
+    async with async_playwright() as pw:
+        browser = None
+        if any(c.kind == "playwright" for c in selected):
+            browser = await pw.chromium.launch(
+                headless=True, executable_path=args.executable_path, args=["--no-sandbox", "--disable-dev-shm-usage"]
+            )
+        try:
+            for case in selected:
+                runs = [await run_case(case, fx, browser, args.sample_ms) for _ in range(max(1, args.repeat))]
+                results.append(summarize(runs))
+        finally:
+            if browser:
+                await browser.close()
+    await robots.close()
+
+    print(f"{'case':<22}{'items':>6}{'navs':>6}{'wall_ms':>10}{'cpu_ms':>9}{'tree_cpu':>10}{'rss_mb':>8}")
+    for r in results:
+        print(
+            f"{r['case']:<22}{r['items']:>6}{r['navs']:>6}{r['wall_ms']:>10.1f}{r['cpu_ms']:>9.1f}"
+            + (f"{r['tree_cpu_ms']:>10.1f}" if r["tree_cpu_ms"] is not None else f"{'-':>10}")
+            + f"{r['peak_rss_mb']:>8.1f}"
+        )
+        for url in r["misses"]:
+            print(f"    not recorded: {url}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"cases": results}, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else None
+    problems = check(results, {c.name: c for c in selected}, baseline, args.tolerance)
+    for p in problems:
+        print(f"FAIL {p}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
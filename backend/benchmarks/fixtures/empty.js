@@ -0,0 +1 @@
+/* recorded scripts are not replayed: the scrapers only read server-rendered HTML */
@@ -0,0 +1,201 @@
+"""Application-scoped Playwright browser pool.
+
+Key design:
+ - One Playwright driver + Chromium launch per process (started by the FastAPI
+   lifespan hook, or lazily on first use)
+ - A bounded set of reusable BrowserContext/Page slots handed out per request
+ - Slots are health-checked on release and recycled after POOL_MAX_NAVIGATIONS
+   main-frame navigations, on page crash, or when the browser disconnects
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+try:  # imported as backend.browser_pool by the backend.scraper package
+    from . import tracing
+except ImportError:
+    import tracing
+
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "4"))
+POOL_MAX_NAVIGATIONS = int(os.getenv("BROWSER_POOL_MAX_NAV", "50"))
+POOL_ACQUIRE_TIMEOUT = float(os.getenv("BROWSER_POOL_ACQUIRE_TIMEOUT_SEC", "30"))
+
+log = logging.getLogger("uvicorn.error")
+
+
+class PoolTimeout(Exception):
+    """No slot became free within POOL_ACQUIRE_TIMEOUT."""
+
+
+class _Slot:
+    __slots__ = ("context", "page", "navigations", "crashed")
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+        self.navigations = 0
+        self.crashed = False
+
+    def healthy(self, max_navigations: int) -> bool:
+        if self.crashed or self.page.is_closed():
+            return False
+        if max_navigations > 0 and self.navigations >= max_navigations:
+            return False
+        return True
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        headless: bool = True,
+        size: int = POOL_SIZE,
+        max_navigations: int = POOL_MAX_NAVIGATIONS,
+        timeout_ms: int = 15_000,
+        context_options: Optional[Callable[[], Dict[str, Any]]] = None,
+        launch_args: Optional[List[str]] = None,
+        context_setup: Optional[Callable[[BrowserContext], Awaitable[None]]] = None,
+    ):
+        self.headless = headless
+        self.size = max(1, size)
+        self.max_navigations = max_navigations
+        self.timeout_ms = timeout_ms
+        self.context_options = context_options or dict
+        self.launch_args = list(launch_args or [])
+        self.context_setup = context_setup
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._idle: List[_Slot] = []
+        self._sem = asyncio.Semaphore(self.size)
+        self._start_lock = asyncio.Lock()
+        self._in_use = 0
+        self.launches = 0
+        self.recycled = 0
+
+    # --- lifecycle ---
+    async def start(self) -> None:
+        async with self._start_lock:
+            if self._browser and self._browser.is_connected():
+                return
+            if self._browser:
+                # crashed / disconnected browser: drop every slot tied to it
+                log.warning("POOL: browser disconnected, relaunching")
+                self._idle.clear()
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+            self.launches += 1
+
+    async def stop(self) -> None:
+        async with self._start_lock:
+            idle, self._idle = self._idle, []
+            for slot in idle:
+                await self._close_slot(slot)
+            try:
+                if self._browser:
+                    await self._browser.close()
+            finally:
+                self._browser = None
+                if self._playwright:
+                    await self._playwright.stop()
+                self._playwright = None
+
+    # --- slots ---
+    async def _new_slot(self) -> _Slot:
+        await self.start()
+        assert self._browser
+        ctx = await self._browser.new_context(**self.context_options())
+        # context-level defaults so extra pages opened by scrapers inherit them
+        ctx.set_default_navigation_timeout(self.timeout_ms)
+        ctx.set_default_timeout(self.timeout_ms)
+        if self.context_setup:
+            await self.context_setup(ctx)
+        page = await ctx.new_page()
+        slot = _Slot(ctx, page)
+
+        def _on_nav(frame):
+            if frame == page.main_frame:
+                slot.navigations += 1
+
+        def _on_crash(_page):
+            slot.crashed = True
+
+        page.on("framenavigated", _on_nav)
+        page.on("crash", _on_crash)
+        return slot
+
+    async def _close_slot(self, slot: _Slot) -> None:
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+
+    async def _acquire(self) -> _Slot:
+        try:
+            await asyncio.wait_for(self._sem.acquire(), timeout=POOL_ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"no browser slot free after {POOL_ACQUIRE_TIMEOUT:.0f}s")
+        try:
+            connected = bool(self._browser and self._browser.is_connected())
+            while self._idle:
+                slot = self._idle.pop()
+                if connected and slot.healthy(self.max_navigations):
+                    return slot
+                self.recycled += 1
+                await self._close_slot(slot)
+            return await self._new_slot()
+        except BaseException:
+            self._sem.release()
+            raise
+
+    async def _release(self, slot: _Slot) -> None:
+        try:
+            # close any extra pages a scraper opened on this context
+            for p in list(slot.context.pages):
+                if p is not slot.page:
+                    try:
+                        await p.close()
+                    except Exception:
+                        pass
+            connected = bool(self._browser and self._browser.is_connected())
+            if connected and slot.healthy(self.max_navigations):
+                self._idle.append(slot)
+            else:
+                self.recycled += 1
+                await self._close_slot(slot)
+        finally:
+            self._sem.release()
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Lease a warm page for the duration of the block."""
+        with tracing.span("browser.acquire") as sp:
+            launches = self.launches
+            slot = await self._acquire()
+            if sp:
+                sp.set(launched=self.launches > launches, navigations=slot.navigations)
+        self._in_use += 1
+        try:
+            yield slot.page
+        finally:
+            self._in_use -= 1
+            await self._release(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "launches": self.launches,
+            "recycled": self.recycled,
+            "connected": bool(self._browser and self._browser.is_connected()),
+        }
@@ -0,0 +1,280 @@
+"""Local book catalog with an inverted index over title/author tokens.
+
+Key design:
+ - Filled by a scheduled full crawl (CATALOG_REFRESH_SEC, 0 disables); a
+   source is indexed only once its full crawl walked the whole listing (the
+   scraper records "complete:<source>" in `tried`). Live /api/library
+   results refresh records of those sources but never add a new source
+ - Persisted as JSON at CATALOG_PATH, loaded once at startup
+ - Tokens are textnorm-normalized (Arabic hamza/ta marbuta/diacritic folding)
+ - search() intersects token postings (prefix match per query token), so
+   /api/library answers known titles in milliseconds; it only answers when
+   every source in scope is complete, otherwise a hit would hide the titles
+   the catalog never saw and live scraping runs instead
+ - A source whose crawl did not finish keeps its previous documents
+ - Only one process per host runs the scheduled crawl: it holds an flock
+   lease on CATALOG_LOCK_PATH for the duration; the other workers retry every
+   CATALOG_LEASE_RETRY_SEC and reload the file once it is newer than theirs
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: single-process deployments only
+    fcntl = None  # type: ignore[assignment]
+
+from textnorm import tokenize
+
+CATALOG_PATH = os.getenv("CATALOG_PATH", str(Path(__file__).resolve().parent / "cache" / "catalog.json"))
+CATALOG_REFRESH_SEC = int(os.getenv("CATALOG_REFRESH_SEC", str(24 * 60 * 60)))
+CATALOG_MAX_RESULTS = int(os.getenv("CATALOG_MAX_RESULTS", "60"))
+CATALOG_CRAWL_PAGES = int(os.getenv("CATALOG_CRAWL_PAGES", "20"))  # listing pages per site
+CATALOG_CRAWL_TIMEOUT_SEC = float(os.getenv("CATALOG_CRAWL_TIMEOUT_SEC", "1800"))
+CATALOG_LOCK_PATH = os.getenv("CATALOG_LOCK_PATH", CATALOG_PATH + ".lock")
+CATALOG_LEASE_RETRY_SEC = int(os.getenv("CATALOG_LEASE_RETRY_SEC", "900"))
+
+SITE_ALIASES = {
+    "coptic": "coptic",
+    "coptic-treasures": "coptic",
+    "coptic_treasures": "coptic",
+    "christianlib": "christianlib",
+    "christian_lib": "christianlib",
+}
+
+log = logging.getLogger("uvicorn.error")
+
+_DOCS: Dict[str, Dict[str, Any]] = {}  # doc key -> book record
+_INDEX: Dict[str, Set[str]] = {}  # token -> doc keys
+_VOCAB: List[str] = []  # sorted tokens, for prefix lookups
+_TOKENS: Dict[str, Tuple[Set[str], Set[str]]] = {}  # doc key -> (title tokens, author tokens)
+_SEQ: Dict[str, int] = {}  # doc key -> insertion number, the tie-break of search()
+_next_seq = 0
+_STATE: Dict[str, Any] = {"built_at": 0.0, "dirty": False, "complete": {}}  # complete: source -> finished crawl time
+SOURCES = sorted(set(SITE_ALIASES.values()))
+
+
+def _doc_key(it: Dict[str, Any]) -> str:
+    return it.get("details_url") or it.get("download_url") or f"{it.get('source')}|{it.get('title')}"
+
+
+def _doc_tokens(it: Dict[str, Any]) -> Tuple[Set[str], Set[str]]:
+    title = set(tokenize(it.get("title_norm") or it.get("title") or ""))
+    return title, set(tokenize(it.get("author_norm") or it.get("author") or ""))
+
+
+def _put(key: str, it: Dict[str, Any]) -> None:
+    """Insert or replace one doc, updating only its own postings."""
+    global _next_seq
+    _drop(key)
+    _DOCS[key] = it
+    _SEQ[key] = _next_seq
+    _next_seq += 1
+    title, author = _TOKENS[key] = _doc_tokens(it)
+    for tok in title | author:
+        posting = _INDEX.get(tok)
+        if posting is None:
+            posting = _INDEX[tok] = set()
+            bisect.insort(_VOCAB, tok)
+        posting.add(key)
+
+
+def _drop(key: str) -> None:
+    if _DOCS.pop(key, None) is None:
+        return
+    del _SEQ[key]
+    title, author = _TOKENS.pop(key)
+    for tok in title | author:
+        posting = _INDEX[tok]
+        posting.discard(key)
+        if not posting:
+            del _INDEX[tok]
+            del _VOCAB[bisect.bisect_left(_VOCAB, tok)]
+
+
+def _reindex() -> None:
+    """Rebuild the index from scratch (after load())."""
+    global _VOCAB, _next_seq
+    _INDEX.clear()
+    _TOKENS.clear()
+    _SEQ.clear()
+    for n, (key, it) in enumerate(_DOCS.items()):
+        title, author = _TOKENS[key] = _doc_tokens(it)
+        _SEQ[key] = n
+        for tok in title | author:
+            _INDEX.setdefault(tok, set()).add(key)
+    _next_seq = len(_DOCS)
+    _VOCAB = sorted(_INDEX)
+
+
+def _postings(prefix: str) -> Set[str]:
+    out: Set[str] = set()
+    i = bisect.bisect_left(_VOCAB, prefix)
+    while i < len(_VOCAB) and _VOCAB[i].startswith(prefix):
+        out |= _INDEX[_VOCAB[i]]
+        i += 1
+    return out
+
+
+def complete_sources(tried: List[str]) -> Set[str]:
+    """Sources whose full crawl finished, from the "complete:<source>" markers."""
+    return {t.partition(":")[2] for t in tried if t.startswith("complete:")}
+
+
+def search(q: Optional[str], site: Optional[str] = None, limit: int = CATALOG_MAX_RESULTS) -> List[Dict[str, Any]]:
+    """Docs whose title/author tokens prefix-match every query token.
+
+    Ranked by query tokens matched whole in the title, then anywhere, then
+    shorter titles, then catalog order. Empty unless every source in scope has a finished full crawl.
+    """
+    toks = tokenize(q or "")
+    source = SITE_ALIASES.get((site or "all").lower())
+    if not toks or not all(s in _STATE["complete"] for s in ([source] if source else SOURCES)):
+        return []
+    keys: Optional[Set[str]] = None
+    for tok in sorted(set(toks), key=len, reverse=True):  # longest = most selective first
+        hits = _postings(tok)
+        keys = hits if keys is None else keys & hits
+        if not keys:
+            return []
+    qtoks = set(toks)
+
+    def rank(key: str) -> Tuple[int, int, int, int]:
+        title, author = _TOKENS[key]
+        return -len(qtoks & title), -len(qtoks & (title | author)), len(title), _SEQ[key]
+
+    out = [_DOCS[k] for k in sorted(keys or (), key=rank)]
+    if source:
+        out = [it for it in out if it.get("source") == source]
+    return out[:limit]
+
+
+def add(items: List[Dict[str, Any]]) -> None:
+    """Merge live-crawl records of complete sources into the index."""
+    items = [it for it in items if it.get("title") and it.get("source") in _STATE["complete"]]
+    if not items:
+        return
+    for it in items:
+        _put(_doc_key(it), dict(it))
+    _STATE["dirty"] = True
+
+
+def replace(items: List[Dict[str, Any]], complete: Set[str]) -> None:
+    """Install a full crawl for the sources in `complete`; other sources
+    (including the rest of `items`) keep their docs and status."""
+    now = time.time()
+    for key in [k for k, it in _DOCS.items() if it.get("source") in complete]:
+        _drop(key)
+    for src in complete:
+        _STATE["complete"][src] = now
+    add([it for it in items if it.get("source") in complete])
+    _STATE["built_at"] = now
+
+
+def load(path: str = CATALOG_PATH) -> int:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    _DOCS.clear()
+    for it in data.get("items", []):
+        _DOCS[_doc_key(it)] = it
+    _reindex()
+    _STATE["complete"] = dict(data.get("complete") or {})
+    # a file without completion data predates it: crawl again right away
+    _STATE["built_at"] = float(data.get("built_at") or 0.0) if "complete" in data else 0.0
+    _STATE["dirty"] = False
+    return len(_DOCS)
+
+
+def save(path: str = CATALOG_PATH) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"  # workers never share a temp file
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(
+            {"built_at": _STATE["built_at"], "complete": _STATE["complete"], "items": list(_DOCS.values())},
+            f,
+            ensure_ascii=False,
+        )
+    os.replace(tmp, path)
+    _STATE["dirty"] = False
+
+
+def flush() -> None:
+    """Persist live-crawl additions made since the last save."""
+    if _STATE["dirty"]:
+        save()
+
+
+def _disk_built_at(path: str = CATALOG_PATH) -> float:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return float(json.load(f).get("built_at") or 0.0)
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+
+@contextmanager
+def _crawl_lease(path: str = CATALOG_LOCK_PATH) -> Iterator[bool]:
+    """Non-blocking exclusive flock; yields False if another process holds it.
+
+    The lock dies with the process, so a crashed crawler never leaves a stale lease.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+        yield True
+
+
+async def refresh_loop(crawl: Callable[[], Awaitable[Tuple[List[Dict[str, Any]], List[str]]]]):
+    """Background task: full crawl whenever the catalog is older than CATALOG_REFRESH_SEC."""
+    if CATALOG_REFRESH_SEC <= 0:
+        return
+    while True:
+        wait = _STATE["built_at"] + CATALOG_REFRESH_SEC - time.time()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if _disk_built_at() > _STATE["built_at"]:
+            log.info("CATALOG: reloaded docs=%d (refreshed by another worker)", load())
+            continue
+        with _crawl_lease() as held:
+            if not held:
+                log.info("CATALOG: crawl lease held by another worker, retry in %ds", CATALOG_LEASE_RETRY_SEC)
+                await asyncio.sleep(CATALOG_LEASE_RETRY_SEC)
+                continue
+            t0 = time.time()
+            try:
+                items, tried = await crawl()
+                done = complete_sources(tried)
+                if done:
+                    replace(items, done)
+                    save()
+                    log.info(
+                        "CATALOG: refreshed docs=%d complete=%s took=%.1fs tried=%s",
+                        len(_DOCS), sorted(done), time.time() - t0, tried,
+                    )
+                else:
+                    log.warning("CATALOG: no source finished its full crawl items=%d tried=%s", len(items), tried)
+            except Exception as e:
+                log.warning("CATALOG: refresh failed %s", e)
+        # on failure retry after an hour rather than spinning
+        _STATE["built_at"] = max(_STATE["built_at"], time.time() - CATALOG_REFRESH_SEC + 3600)
+
+
+def stats() -> Dict[str, Any]:
+    return {"docs": len(_DOCS), "tokens": len(_VOCAB), "built_at": _STATE["built_at"], "complete": sorted(_STATE["complete"])}
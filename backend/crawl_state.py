@@ -0,0 +1,77 @@
+"""Remembered crawl state for incremental catalog refreshes.
+
+Key design:
+ - One JSON file per crawler: details URL -> last seen book record, plus the
+   time of the last full (non-incremental) pass
+ - Incremental crawls stop paginating at the first listing page whose items
+   are all already known; older items are served from the remembered records
+ - A full re-verification is due every CRAWL_FULL_VERIFY_SEC (default 7 days)
+   so removed/edited books are eventually picked up
+ - Only a full pass that reached the end of the listing may drop URLs
+   (replace_all); one stopped by the crawler's page cap still counts as a
+   re-verification (mark_full) but keeps the URLs beyond the cap, and a
+   pass cut short by errors changes neither
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+CRAWL_FULL_VERIFY_SEC = int(os.getenv("CRAWL_FULL_VERIFY_SEC", str(7 * 24 * 60 * 60)))
+
+
+class CrawlState:
+    def __init__(self, path: str, full_verify_sec: int = CRAWL_FULL_VERIFY_SEC):
+        self.path = path
+        self.full_verify_sec = full_verify_sec
+        self.last_full = 0.0
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.last_full = float(data.get("last_full") or 0.0)
+        self.items = dict(data.get("items") or {})
+
+    def save(self) -> None:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"last_full": self.last_full, "items": self.items}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def full_due(self) -> bool:
+        return time.time() - self.last_full > self.full_verify_sec
+
+    def known(self, url: Optional[str]) -> bool:
+        return bool(url) and url in self.items
+
+    def get(self, url: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self.items.get(url) if url else None
+
+    def all_known(self, urls: Iterable[Optional[str]]) -> bool:
+        urls = [u for u in urls if u]
+        return bool(urls) and all(u in self.items for u in urls)
+
+    def remember(self, url: Optional[str], record: Dict[str, Any]) -> None:
+        if url:
+            self.items[url] = record
+
+    def replace_all(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Install the result of a full pass (drops URLs no longer listed)."""
+        self.items = dict(records)
+        self.last_full = time.time()
+
+    def mark_full(self) -> None:
+        """Record a full pass that stopped at the page cap (nothing is dropped)."""
+        self.last_full = time.time()
+
+    def records(self, where=None) -> List[Dict[str, Any]]:
+        return [r for r in self.items.values() if where is None or where(r)]
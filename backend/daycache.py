@@ -1,44 +1,290 @@
-"""Simple in-memory (process local) daily cache.
+"""Daily result cache with pluggable storage.
 
 Key design:
  - Key includes (site|q|max_pages|max_follow|version)
- - TTL = 24h (can be tuned)
- - We don't cache empty lists to allow selector evolution.
+ - TTL = 24h hard (can be tuned); after the soft TTL (DAYCACHE_SOFT_TTL_SEC)
+   lookup() still serves the entry but flags it stale so the caller can
+   refresh it in the background (stale-while-revalidate)
+ - Past the hard TTL entries are kept for DAYCACHE_GRACE_SEC more; they are
+   misses for lookup() but get_expired() can still serve them when live
+   scraping is saturated (admission control)
+ - We don't cache empty lists to allow selector evolution; instead empty
+   outcomes go to a separate negative cache (key prefix "neg|") with a short
+   DAYCACHE_NEGATIVE_TTL_SEC, together with the `tried` selector trail
+ - Bounded: LRU eviction past DAYCACHE_MAX_ENTRIES entries or ~DAYCACHE_MAX_BYTES
+   (JSON-encoded size), plus a periodic purge of expired entries
+ - stats() reports entries, bytes and hit/miss/eviction counters
+ - Storage backend chosen by DAYCACHE_BACKEND:
+     memory  process local dict (default, single worker)
+     sqlite  file at DAYCACHE_PATH in WAL mode, so several uvicorn workers
+             read and write the same entries concurrently
 """
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
+import os
+import sqlite3
 import time
+from collections import OrderedDict
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 DAILY_TTL = 24 * 60 * 60
-_STORE: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+SOFT_TTL = int(os.getenv("DAYCACHE_SOFT_TTL_SEC", str(6 * 60 * 60)))
+NEGATIVE_TTL = int(os.getenv("DAYCACHE_NEGATIVE_TTL_SEC", str(15 * 60)))
+GRACE_TTL = int(os.getenv("DAYCACHE_GRACE_SEC", str(3 * 24 * 60 * 60)))
+DAYCACHE_BACKEND = os.getenv("DAYCACHE_BACKEND", "memory").lower()
+DAYCACHE_PATH = os.getenv("DAYCACHE_PATH", str(Path(__file__).resolve().parent / "cache" / "daycache.sqlite3"))
+DAYCACHE_MAX_ENTRIES = int(os.getenv("DAYCACHE_MAX_ENTRIES", "2000"))
+DAYCACHE_MAX_BYTES = int(os.getenv("DAYCACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+PURGE_INTERVAL_SEC = int(os.getenv("DAYCACHE_PURGE_INTERVAL_SEC", "600"))
+ATIME_RESOLUTION_SEC = int(os.getenv("DAYCACHE_ATIME_RESOLUTION_SEC", "300"))
+
+_STATS = {"hits": 0, "misses": 0, "stale": 0, "negative_hits": 0, "grace_hits": 0}
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+class MemoryBackend:
+    """Process-local LRU of key -> (ts, value, size)."""
+
+    def __init__(self, max_entries: int = DAYCACHE_MAX_ENTRIES, max_bytes: int = DAYCACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._bytes = 0
+        self._store: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        rec = self._store.get(key)
+        if rec is None:
+            return None
+        self._store.move_to_end(key)
+        return rec[0], rec[1]
+
+    def set(self, key: str, ts: float, value: Any) -> None:
+        self.delete(key)
+        size = _size(value)
+        self._store[key] = (ts, value, size)
+        self._bytes += size
+        while len(self._store) > self.max_entries or (self._bytes > self.max_bytes and len(self._store) > 1):
+            _, (_, _, old) = self._store.popitem(last=False)
+            self._bytes -= old
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        rec = self._store.pop(key, None)
+        if rec is not None:
+            self._bytes -= rec[2]
+
+    def purge(self, cutoff: float, prefix: str = "") -> int:
+        old = [k for k, (ts, _, _) in self._store.items() if ts < cutoff and k.startswith(prefix)]
+        for k in old:
+            self.delete(k)
+        return len(old)
+
+    def usage(self) -> Tuple[int, int]:
+        return len(self._store), self._bytes
+
+
+class SqliteBackend:
+    """SQLite file shared by every worker process on the host.
+
+    WAL journaling lets readers proceed while one writer commits; values are
+    stored as JSON text. LRU order is tracked in the atime column, so the
+    bounds hold across workers (eviction counts are per process). A hit is a
+    plain read: atime only moves once it is ATIME_RESOLUTION_SEC old, and
+    those touches are batched into the next write (set/purge) instead of
+    taking the write lock on every lookup.
+    """
+
+    def __init__(self, path: str, max_entries: int = DAYCACHE_MAX_ENTRIES, max_bytes: int = DAYCACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._touched: Dict[str, float] = {}  # key -> atime not yet written
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, ts REAL NOT NULL, value TEXT NOT NULL)")
+        cols = {r[1] for r in self._db.execute("PRAGMA table_info(entries)")}
+        if "atime" not in cols:
+            self._db.execute("ALTER TABLE entries ADD COLUMN atime REAL NOT NULL DEFAULT 0")
+        if "size" not in cols:
+            self._db.execute("ALTER TABLE entries ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_atime ON entries (atime)")
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        row = self._db.execute("SELECT ts, value, atime FROM entries WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        now = time.time()
+        if now - row[2] > ATIME_RESOLUTION_SEC:
+            self._touched[key] = now
+        try:
+            return row[0], json.loads(row[1])
+        except ValueError:
+            return None
+
+    def _flush_touched(self) -> None:
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany("UPDATE entries SET atime = ? WHERE key = ?", [(t, k) for k, t in touched.items()])
+        finally:
+            self._db.execute("COMMIT")
+
+    def set(self, key: str, ts: float, value: Any) -> None:
+        self._flush_touched()  # so eviction sees recent hits
+        text = json.dumps(value, ensure_ascii=False)
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries (key, ts, value, atime, size) VALUES (?, ?, ?, ?, ?)",
+            (key, ts, text, time.time(), len(text.encode("utf-8"))),
+        )
+        self._evict()
+
+    def _evict(self) -> None:
+        entries, nbytes = self.usage()
+        while entries > self.max_entries or (nbytes > self.max_bytes and entries > 1):
+            row = self._db.execute("SELECT key, size FROM entries ORDER BY atime LIMIT 1").fetchone()
+            if not row:
+                return
+            self._db.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            entries, nbytes = entries - 1, nbytes - row[1]
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def purge(self, cutoff: float, prefix: str = "") -> int:
+        self._flush_touched()
+        return self._db.execute(
+            "DELETE FROM entries WHERE ts < ? AND substr(key, 1, ?) = ?", (cutoff, len(prefix), prefix)
+        ).rowcount
+
+    def usage(self) -> Tuple[int, int]:
+        n, b = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return int(n), int(b)
+
+
+def _make_backend():
+    if DAYCACHE_BACKEND == "sqlite":
+        return SqliteBackend(DAYCACHE_PATH)
+    return MemoryBackend()
+
+
+_backend = _make_backend()
+
+
+def configure(backend) -> None:
+    """Swap the storage backend (get/set/delete/purge/usage + evictions)."""
+    global _backend
+    _backend = backend
 
 
 def make_key(site: Optional[str], q: Optional[str], max_pages: int, max_follow: int, version: str) -> str:
     return f"v{version}|site={site or 'all'}|q={q or ''}|p={max_pages}|f={max_follow}".lower()
 
 
-def get(key: str) -> Optional[List[Dict[str, Any]]]:
-    rec = _STORE.get(key)
+def lookup(key: str) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+    """(data, stale) while within the hard TTL, else None."""
+    rec = _backend.get(key)
     if not rec:
+        _STATS["misses"] += 1
         return None
     ts, data = rec
-    if time.time() - ts > DAILY_TTL:
-        _STORE.pop(key, None)
+    age = time.time() - ts
+    if age > DAILY_TTL or not data:
+        if age > DAILY_TTL + GRACE_TTL or not data:
+            _backend.delete(key)
+        _STATS["misses"] += 1
         return None
-    if not data:
-        return None
-    return data
+    _STATS["hits"] += 1
+    stale = age > SOFT_TTL
+    if stale:
+        _STATS["stale"] += 1
+    return data, stale
+
+
+def get(key: str) -> Optional[List[Dict[str, Any]]]:
+    hit = lookup(key)
+    return hit[0] if hit else None
 
 
 def set(key: str, data: List[Dict[str, Any]]):
     if not data:
         return
-    _STORE[key] = (time.time(), data)
+    _backend.set(key, time.time(), data)
+
+
+def get_expired(key: str) -> Optional[List[Dict[str, Any]]]:
+    """Data for key even past the hard TTL (within the grace period), else None."""
+    rec = _backend.get(key)
+    if not rec or not rec[1] or time.time() - rec[0] > DAILY_TTL + GRACE_TTL:
+        return None
+    _STATS["grace_hits"] += 1
+    return rec[1]
 
 
-def purge():  # optional maintenance
+def get_negative(key: str) -> Optional[List[str]]:
+    """The `tried` trail of a recent empty result for key, else None."""
+    if NEGATIVE_TTL <= 0:
+        return None
+    nkey = "neg|" + key
+    rec = _backend.get(nkey)
+    if not rec:
+        return None
+    ts, value = rec
+    if time.time() - ts > NEGATIVE_TTL:
+        _backend.delete(nkey)
+        return None
+    _STATS["negative_hits"] += 1
+    return list(value.get("tried") or [])
+
+
+def set_negative(key: str, tried: List[str]):
+    if NEGATIVE_TTL <= 0:
+        return
+    _backend.set("neg|" + key, time.time(), {"tried": list(tried)})
+
+
+def purge() -> int:
     now = time.time()
-    for k, (ts, _) in list(_STORE.items()):
-        if now - ts > DAILY_TTL:
-            _STORE.pop(k, None)
+    return _backend.purge(now - NEGATIVE_TTL, "neg|") + _backend.purge(now - DAILY_TTL - GRACE_TTL)
+
+
+async def purge_loop(interval: float = PURGE_INTERVAL_SEC):
+    """Background task: drop expired entries every `interval` seconds."""
+    log = logging.getLogger("uvicorn.error")
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            n = purge()
+            if n:
+                log.info("CACHE: purged %d expired entries", n)
+        except Exception as e:
+            log.warning("CACHE: purge failed %s", e)
+
+
+def stats() -> Dict[str, Any]:
+    entries, nbytes = _backend.usage()
+    return {
+        "backend": type(_backend).__name__,
+        "entries": entries,
+        "bytes": nbytes,
+        "hits": _STATS["hits"],
+        "misses": _STATS["misses"],
+        "stale": _STATS["stale"],
+        "negative_hits": _STATS["negative_hits"],
+        "grace_hits": _STATS["grace_hits"],
+        "evictions": getattr(_backend, "evictions", 0),
+        "max_entries": getattr(_backend, "max_entries", None),
+        "max_bytes": getattr(_backend, "max_bytes", None),
+    }
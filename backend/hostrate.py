@@ -0,0 +1,104 @@
+"""Per-host request scheduler (token bucket) shared by every scraper.
+
+Key design:
+ - Every navigation / HTTP fetch calls `await acquire(url)` first; buckets
+   are keyed by host and shared across concurrent requests in the process
+ - Each host refills one token per interval, where interval is the larger of
+   the robots.txt Crawl-delay (via the delay source installed with
+   set_delay_source) and HOSTRATE_MIN_INTERVAL_SEC; up to HOSTRATE_BURST
+   tokens accumulate while idle (burst 1 when a Crawl-delay is set)
+ - Reservations are taken synchronously, so N concurrent callers are spaced
+   one interval apart instead of all sleeping the same random delay and
+   firing together; an idle host costs no wait at all
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+MIN_INTERVAL_SEC = float(os.getenv("HOSTRATE_MIN_INTERVAL_SEC", "0.5"))
+BURST = max(1, int(os.getenv("HOSTRATE_BURST", "3")))
+MAX_CRAWL_DELAY_SEC = float(os.getenv("HOSTRATE_MAX_CRAWL_DELAY_SEC", "30"))
+
+
+class Bucket:
+    __slots__ = ("interval", "burst", "tokens", "updated", "acquired", "waited")
+
+    def __init__(self, interval: float, burst: int):
+        self.interval = interval
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.acquired = 0
+        self.waited = 0.0
+
+    def reserve(self) -> float:
+        """Take one token (possibly borrowed) and return how long to wait."""
+        now = time.monotonic()
+        if self.interval > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+        else:
+            self.tokens = float(self.burst)
+        self.updated = now
+        self.tokens -= 1
+        self.acquired += 1
+        wait = -self.tokens * self.interval if self.tokens < 0 else 0.0
+        self.waited += wait
+        return wait
+
+
+_BUCKETS: Dict[str, Bucket] = {}
+_delay_source: Optional[Callable[[str], Awaitable[Optional[float]]]] = None
+
+
+def set_delay_source(fn: Optional[Callable[[str], Awaitable[Optional[float]]]]) -> None:
+    """Install `async fn(site_root) -> Crawl-delay seconds | None` (robots.crawl_delay)."""
+    global _delay_source
+    _delay_source = fn
+
+
+async def _policy(root: str, min_interval: Optional[float]):
+    interval = MIN_INTERVAL_SEC if min_interval is None else min_interval
+    burst = BURST
+    if _delay_source is not None:
+        try:
+            delay = await _delay_source(root)
+        except Exception:
+            delay = None
+        if delay:
+            interval = max(interval, min(delay, MAX_CRAWL_DELAY_SEC))
+            burst = 1
+    return interval, burst
+
+
+async def acquire(url: str, min_interval: Optional[float] = None) -> float:
+    """Wait for this URL's host turn; returns the seconds waited."""
+    parts = urlparse(url)
+    host = (parts.hostname or "").lower()
+    if not host:
+        return 0.0
+    interval, burst = await _policy(f"{parts.scheme or 'https'}://{parts.netloc}", min_interval)
+    bucket = _BUCKETS.get(host)
+    if bucket is None:
+        bucket = _BUCKETS[host] = Bucket(interval, burst)
+    else:
+        bucket.interval, bucket.burst = interval, burst
+    wait = bucket.reserve()
+    if wait > 0:
+        await asyncio.sleep(wait)
+    return wait
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        host: {
+            "interval": b.interval,
+            "burst": b.burst,
+            "acquired": b.acquired,
+            "waited_sec": round(b.waited, 2),
+        }
+        for host, b in _BUCKETS.items()
+    }
@@ -0,0 +1,156 @@
+"""Background search jobs for deep crawls (process local).
+
+Key design:
+ - submit() enqueues a search and returns at once with a job id; the caller
+   polls get() for status, progress and the items found so far
+ - A fixed pool of JOBS_WORKERS tasks drains a queue bounded by
+   JOBS_QUEUE_MAX, so bursts of deep searches wait (or are rejected with
+   QueueFull) instead of competing for browser slots
+ - Every long background crawl (a job, or the scheduled catalog crawl) runs
+   under background_slot(): at most JOBS_WORKERS of them at once, capped
+   below ADMISSION_MAX_ACTIVE, so they never hold every crawl slot
+ - Job crawls get JOBS_SITE_TIMEOUT_SEC per site instead of the interactive
+   SITE_TIMEOUT_SEC: deep listings spaced by hostrate take minutes
+ - Finished jobs are kept for JOBS_TTL_SEC (at most JOBS_MAX records) and
+   then forgotten; results also land in daycache/catalog via search_books
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from admission import ADMISSION_MAX_ACTIVE
+
+# leave at least one admission slot for interactive misses (shared with the catalog crawl)
+JOBS_WORKERS = max(1, min(int(os.getenv("JOBS_WORKERS", "1")), ADMISSION_MAX_ACTIVE - 1))
+JOBS_QUEUE_MAX = int(os.getenv("JOBS_QUEUE_MAX", "20"))
+JOBS_TTL_SEC = int(os.getenv("JOBS_TTL_SEC", "3600"))
+JOBS_MAX = int(os.getenv("JOBS_MAX", "500"))
+JOBS_SITE_TIMEOUT_SEC = float(os.getenv("JOBS_SITE_TIMEOUT_SEC", str(15 * 60)))
+
+# run(params, on_item) -> (items, cached, tried, stale), i.e. search_books
+Runner = Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], Awaitable[Tuple[List[Dict[str, Any]], bool, List[str], bool]]]
+
+log = logging.getLogger("uvicorn.error")
+
+
+class QueueFull(Exception):
+    """JOBS_QUEUE_MAX jobs are already waiting."""
+
+
+_JOBS: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_QUEUE: Optional[asyncio.Queue] = None
+_BACKGROUND: Optional[asyncio.Semaphore] = None
+
+
+def _queue() -> asyncio.Queue:
+    global _QUEUE
+    if _QUEUE is None:
+        _QUEUE = asyncio.Queue(maxsize=JOBS_QUEUE_MAX)
+    return _QUEUE
+
+
+def background_slot() -> asyncio.Semaphore:
+    """Shared by job workers and other long background crawls (`async with`)."""
+    global _BACKGROUND
+    if _BACKGROUND is None:
+        _BACKGROUND = asyncio.Semaphore(JOBS_WORKERS)
+    return _BACKGROUND
+
+
+def _prune() -> None:
+    cutoff = time.time() - JOBS_TTL_SEC
+    for jid in [k for k, j in _JOBS.items() if j["finished_at"] and j["finished_at"] < cutoff]:
+        del _JOBS[jid]
+    while len(_JOBS) > JOBS_MAX:
+        jid = next((k for k, j in _JOBS.items() if j["finished_at"]), None)
+        if jid is None:
+            break
+        del _JOBS[jid]
+
+
+def submit(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Enqueue a search; raises QueueFull when the queue is at capacity."""
+    _prune()
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "params": dict(params),
+        "submitted_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "items": [],
+        "cached": False,
+        "stale": False,
+        "tried": [],
+        "error": None,
+    }
+    try:
+        _queue().put_nowait(job["id"])
+    except asyncio.QueueFull:
+        raise QueueFull(f"{JOBS_QUEUE_MAX} jobs already queued")
+    _JOBS[job["id"]] = job
+    return job
+
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    return _JOBS.get(job_id)
+
+
+def position(job_id: str) -> int:
+    """1-based place among queued jobs (0 when not queued)."""
+    n = 0
+    for j in _JOBS.values():
+        if j["status"] == "queued":
+            n += 1
+            if j["id"] == job_id:
+                return n
+    return 0
+
+
+async def _run_job(job: Dict[str, Any], run: Runner) -> None:
+    job["status"] = "running"
+    job["started_at"] = time.time()
+    try:
+        items, cached, tried, stale = await run(job["params"], job["items"].append)
+        # the final list is de-duplicated; it replaces the streamed partials
+        # unless it came back empty (then keep what was streamed)
+        job.update(items=list(items) if items or not job["items"] else job["items"], cached=cached, tried=list(tried), stale=stale, status="done")
+    except asyncio.CancelledError:
+        job.update(status="failed", error="cancelled")
+        raise
+    except Exception as e:
+        log.warning("JOBS: %s failed %s", job["id"], e)
+        job.update(status="failed", error=str(e))
+    finally:
+        job["finished_at"] = time.time()
+
+
+async def worker(run: Runner) -> None:
+    q = _queue()
+    while True:
+        job_id = await q.get()
+        try:
+            job = _JOBS.get(job_id)
+            if job is not None:
+                async with background_slot():  # stays "queued" behind a catalog crawl
+                    await _run_job(job, run)
+        finally:
+            q.task_done()
+
+
+def start(run: Runner) -> List["asyncio.Task[None]"]:
+    """Spawn the worker pool (cancel the returned tasks on shutdown)."""
+    return [asyncio.create_task(worker(run)) for _ in range(JOBS_WORKERS)]
+
+
+def stats() -> Dict[str, Any]:
+    by_status: Dict[str, int] = {}
+    for j in _JOBS.values():
+        by_status[j["status"]] = by_status.get(j["status"], 0) + 1
+    return {"workers": JOBS_WORKERS, "queue_max": JOBS_QUEUE_MAX, "queued": _queue().qsize(), **by_status}
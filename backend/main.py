@@ -1,9 +1,20 @@
 """Elmafdein Library API
 ---------------------------------
 FastAPI + Playwright scrapers (Coptic Treasures / ChristianLib) with:
- - Polite scraping (delays, robots awareness handled in scrapers)
+ - Polite scraping: per-host token bucket (robots Crawl-delay aware), async cached robots.txt checks
  - Daily in‑memory cache (no caching of empty results)
- - Unified response shape { items, count, took_ms, cached, hint? }
+ - Single-flight coalescing of identical concurrent cache misses
+ - Stale-while-revalidate: soft-expired entries served at once, refreshed in background
+ - Local catalog index (scheduled full crawl) answers known titles without scraping
+ - Shared Chromium pool (launched once per process, pages leased per request)
+ - Lean pages: images/fonts/CSS and third-party hosts blocked, domcontentloaded navigation
+ - Admission control: bounded concurrent crawls + wait queue; 503/expired cache when saturated
+ - Per-IP GCRA rate limits: a generous budget for every request, a tight one for live crawls
+ - /metrics: Prometheus text (scrape/navigation latency, cache, limiter, pool, stage errors)
+ - Tracing spans per stage (OTLP/JSON file or collector); ?debug=timings returns them inline
+ - Unified response shape { items, count, took_ms, cached, stale, hint? }
+ - /api/library/stream: NDJSON or SSE frames per book as scrapers find them, then a summary
+ - /api/library/jobs: deep crawls queued to a bounded worker pool, polled by job id
  - NO local storage of PDFs (only deep links / metadata)
  - Secondary hop fallback for ChristianLib when initial deep phase empty
 """
@@ -11,17 +22,19 @@ FastAPI + Playwright scrapers (Coptic Treasures / ChristianLib) with:
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
 import os
 import random
 import re
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, Query, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from playwright.async_api import async_playwright, Browser, Page
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from playwright.async_api import Page
 
 """Import strategy
 We prefer absolute imports (models_types, scrapers, cache) but we proactively
@@ -35,33 +48,44 @@ _HERE = _pl.Path(__file__).resolve().parent
 if str(_HERE) not in _sys.path:
     _sys.path.insert(0, str(_HERE))
 
-from models_types import Book, LibraryResponse  # local module
+from models_types import Book, LibraryJobRequest, LibraryResponse  # local module
 from scrapers import coptic as scraper_coptic
 from scrapers import christianlib as scraper_christianlib
+from scrapers.extract import extract_attrs
 import daycache
+import singleflight
+import catalog
+import textnorm
+import page_policy
+import robots
+import hostrate
+import jobs
+import ratelimit
+import admission
+import metrics
+import tracing
+from browser_pool import BrowserPool
 
 APP_TITLE = "Elmafdein Library API"
 REQUEST_TIMEOUT_MS = 15_000
+SITE_TIMEOUT_SEC = float(os.getenv("SITE_TIMEOUT_SEC", "45"))  # per-site budget in search_books
+# after a background refresh of a stale entry fails, serve it without retrying for this long
+STALE_REFRESH_BACKOFF_SEC = float(os.getenv("STALE_REFRESH_BACKOFF_SEC", "600"))
 HEADLESS = os.getenv("DEBUG", "0") not in ("1", "true", "True")
 USER_AGENTS = [
     "ElmafdeinBot/1.0 (+contact: example@example.com) Chrome/125",
     "ElmafdeinBot/1.0 (+contact: example@example.com) Safari/16.6",
 ]
 
-# --- Simple in-process IP rate limiting (fixed window) ---
-RATE_LIMIT_MAX = int(os.getenv("RATE_LIMIT_MAX", "30"))  # requests
-RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW_SEC", "300"))  # seconds
-_RL_STORE: Dict[str, Tuple[int, float]] = {}
-
-def _rl_now() -> float:
-    return time.time()
+def _item_key(it: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    return ((it.get("title") or "").strip().lower(), it.get("download_url") or it.get("details_url"))
 
 
 def _dedup(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     seen = set()
     out: List[Dict[str, Any]] = []
     for it in items:
-        key = ((it.get("title") or "").strip().lower(), it.get("download_url") or it.get("details_url"))
+        key = _item_key(it)
         if key in seen:
             continue
         seen.add(key)
@@ -69,96 +93,91 @@ def _dedup(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return out
 
 
-class PWSession:
-    def __init__(self):
-        self.playwright = None
-        self.browser: Optional[Browser] = None
+def _context_options() -> Dict[str, Any]:
+    return {
+        "user_agent": random.choice(USER_AGENTS),
+        "locale": "ar-EG",
+        "viewport": {"width": 1280, "height": 900},
+    }
 
-    async def __aenter__(self):
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=HEADLESS)
-        return self
 
-    async def __aexit__(self, exc_type, exc, tb):
-        try:
-            if self.browser:
-                await self.browser.close()
-        finally:
-            if self.playwright:
-                await self.playwright.stop()
-
-    async def new_page(self) -> Page:
-        assert self.browser
-        ctx = await self.browser.new_context(
-            user_agent=random.choice(USER_AGENTS),
-            locale="ar-EG",
-            viewport={"width": 1280, "height": 900},
-        )
-        p = await ctx.new_page()
-        p.set_default_navigation_timeout(REQUEST_TIMEOUT_MS)
-        p.set_default_timeout(REQUEST_TIMEOUT_MS)
-        return p
+POOL = BrowserPool(
+    headless=HEADLESS,
+    timeout_ms=REQUEST_TIMEOUT_MS,
+    context_options=_context_options,
+    context_setup=page_policy.install,
+)
+hostrate.set_delay_source(robots.crawl_delay)
+
+SITE_SECONDS = metrics.Histogram(
+    "library_site_scrape_seconds", "Per-site scrape latency within one crawl", labels=("site", "outcome")
+)
+DETAIL_PAGES = metrics.Histogram(
+    "library_detail_pages_per_request",
+    "Detail pages visited per live crawl",
+    buckets=(0, 1, 2, 4, 6, 8, 10, 15, 20, 30, 50, 100),
+)
+STAGES = metrics.Counter("library_scrape_stages_total", "Selector stages recorded in `tried` by live crawls", labels=("stage",))
+SCRAPE_ERRORS = metrics.Counter("library_scrape_errors_total", "Scraper errors and timeouts by site", labels=("site", "kind"))
 
 
-async def _secondary_hop_fallback(page: Page, query: str, max_follow: int, tried: List[str]) -> List[Dict[str, Any]]:
+async def _secondary_hop_fallback(
+    page: Page, query: str, max_follow: int, tried: List[str], on_item: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
     """Attempt a secondary hop on ChristianLib search results pages to salvage suggestions.
 
     We visit up to `max_follow` candidate detail pages and return first batch
     of minimal book records (may lack download_url if none clearly found).
     """
-    base = "https://www.christianlib.com"
-    search_urls = [f"{base}/?s={query}", f"{base}/search/{query}"]
-    visited: set[str] = set()
-    results: List[Dict[str, Any]] = []
-    for surl in search_urls:
-        try:
-            await page.goto(surl)
-            await asyncio.sleep(0.5)
-        except Exception:
-            continue
-        anchors = await page.query_selector_all("a[href]")
-        candidates: List[str] = []
-        for a in anchors:
-            href = await a.get_attribute("href") or ""
-            if not href or href.startswith("#"):
-                continue
-            if any(p in href for p in ["/book/", "/?p=", ".html"]):
-                full = href if href.startswith("http") else base + href
-                if full not in visited:
-                    visited.add(full)
-                    candidates.append(full)
-            if len(candidates) >= max_follow:
-                break
-        for url in candidates:
-            if len(results) >= max_follow:
-                break
+    with tracing.span("secondary_hop", max_follow=max_follow) as sp:
+        base = "https://www.christianlib.com"
+        search_urls = [f"{base}/?s={query}", f"{base}/search/{query}"]
+        visited: set[str] = set()
+        results: List[Dict[str, Any]] = []
+        for surl in search_urls:
             try:
-                await page.goto(url)
-                await asyncio.sleep(0.4)
-                pdf = ""
-                a_pdf = await page.query_selector("a[href*='.pdf']")
-                if a_pdf:
-                    h = await a_pdf.get_attribute("href")
-                    if h:
-                        pdf = h if h.startswith("http") else base + h
-                if not pdf:
-                    btn = await page.query_selector("a:has-text('تحميل'), a:has-text('Download'), button:has-text('PDF')")
-                    if btn:
-                        h = await btn.get_attribute("href")
+                await page_policy.goto(page, surl, stage="listing")
+            except Exception:
+                continue
+            candidates: List[str] = []
+            for href in await extract_attrs(page, "a[href]", "href"):
+                if not href or href.startswith("#"):
+                    continue
+                if any(p in href for p in ["/book/", "/?p=", ".html"]):
+                    full = href if href.startswith("http") else base + href
+                    if full not in visited:
+                        visited.add(full)
+                        candidates.append(full)
+                if len(candidates) >= max_follow:
+                    break
+            for url in candidates:
+                if len(results) >= max_follow:
+                    break
+                try:
+                    await page_policy.goto(page, url, stage="detail")
+                    pdf = ""
+                    a_pdf = await page.query_selector("a[href*='.pdf']")
+                    if a_pdf:
+                        h = await a_pdf.get_attribute("href")
                         if h:
                             pdf = h if h.startswith("http") else base + h
-                if not pdf:
-                    ifr = await page.query_selector("iframe[src*='.pdf']")
-                    if ifr:
-                        src = await ifr.get_attribute("src")
-                        if src:
-                            pdf = src if src.startswith("http") else base + src
-                title_el = await page.query_selector("h1, h2, .entry-title")
-                title = (await title_el.inner_text() if title_el else "").strip()
-                if not title:
-                    continue
-                results.append(
-                    {
+                    if not pdf:
+                        btn = await page.query_selector("a:has-text('تحميل'), a:has-text('Download'), button:has-text('PDF')")
+                        if btn:
+                            h = await btn.get_attribute("href")
+                            if h:
+                                pdf = h if h.startswith("http") else base + h
+                    if not pdf:
+                        ifr = await page.query_selector("iframe[src*='.pdf']")
+                        if ifr:
+                            src = await ifr.get_attribute("src")
+                            if src:
+                                pdf = src if src.startswith("http") else base + src
+                    title_el = await page.query_selector("h1, h2, .entry-title")
+                    title = (await title_el.inner_text() if title_el else "").strip()
+                    if not title:
+                        continue
+                    rec = {
                         "title": title,
                         "author": "",
                         "source": "christianlib",
@@ -167,75 +186,318 @@ async def _secondary_hop_fallback(page: Page, query: str, max_follow: int, tried
                         "cover_image": "",
                         "lang": "ar" if re.search(r"[\u0600-\u06FF]", title) else "en",
                     }
-                )
-            except Exception:
-                continue
-        if results:
-            break
+                    results.append(rec)
+                    if on_item:
+                        on_item(rec)
+                except Exception:
+                    continue
+            if results:
+                break
+        if sp:
+            sp.set(results=len(results))
     if results:
         tried.append("secondary_hop")
     return results
 
 
+async def _run_site(
+    name: str,
+    fn,
+    tried: List[str],
+    timeout: float = SITE_TIMEOUT_SEC,
+    on_item: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """Run one site scraper on its own page with a per-site deadline.
+
+    `fn(page, tried, report)` passes each record to `report` as it is found;
+    they are forwarded to `on_item` and kept, so errors and timeouts (recorded
+    in `tried`) still yield what the site produced before failing, and the
+    other site's results are returned either way.
+    """
+    partial: List[Dict[str, Any]] = []
+
+    def report(it: Dict[str, Any]) -> None:
+        partial.append(it)
+        if on_item:
+            on_item(it)
+
+    t0 = time.perf_counter()
+    outcome = "error"
+    try:
+        with tracing.span(f"site:{name}") as sp:
+            async with POOL.page() as page:
+                part = await asyncio.wait_for(fn(page, tried, report), timeout=timeout)
+            if sp:
+                sp.set(items=len(part))
+        outcome = "ok" if part else "empty"
+        return part
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        tried.append(f"timeout:{name}")
+        logging.getLogger("uvicorn.error").warning("LIB: %s timed out after %.0fs", name, timeout)
+    except Exception as e:
+        tried.append(f"error:{name}")
+        logging.getLogger("uvicorn.error").warning("LIB: %s error %s", name, e)
+    finally:
+        SITE_SECONDS.observe(time.perf_counter() - t0, site=name, outcome=outcome)
+    return partial
+
+
+def _clean(it: Dict[str, Any]) -> Dict[str, Any]:
+    """Sanitize a record in place and add the precomputed match fields."""
+    for k in ("title", "author", "source", "details_url", "download_url", "cover_image"):
+        if it.get(k):
+            it[k] = str(it[k]).strip()
+    return textnorm.annotate(it)
+
+
+async def _scrape(
+    query: Optional[str],
+    site: Optional[str],
+    max_pages: int,
+    max_follow: int,
+    site_timeout: float = SITE_TIMEOUT_SEC,
+    on_item: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Live crawl of the requested sites (no cache). Returns (items, tried).
+
+    `on_item` receives each cleaned, de-duplicated record as soon as a
+    scraper produces it (used by the streaming endpoint). Records a site
+    reported before its deadline are kept when it times out.
+    """
+    tried: List[str] = []
+    out: List[Dict[str, Any]] = []
+    scope = (site or "all").lower()
+    emit = None
+    if on_item:
+        emitted: set = set()
+
+        def emit(it: Dict[str, Any]) -> None:
+            key = _item_key(it)
+            if key not in emitted:
+                emitted.add(key)
+                on_item(_clean(it))
+
+    sites = []
+    if scope in ("all", "coptic", "coptic-treasures", "coptic_treasures"):
+        sites.append(("coptic", lambda page, t, rep: scraper_coptic.scrape(page, query, max_pages, t, on_item=rep)))
+    if scope in ("all", "christianlib", "christian_lib"):
+        sites.append(
+            (
+                "christianlib",
+                lambda page, t, rep: scraper_christianlib.scrape(page, query, max_pages, t, max_follow=max_follow, on_item=rep),
+            )
+        )
+    # Each site runs on its own leased page; total latency is the slowest site.
+    navs: Dict[str, int] = {}
+    page_policy.REQUEST_NAVS.set(navs)  # shared with the site tasks below
+    site_tried: List[List[str]] = [[] for _ in sites]
+    parts = await asyncio.gather(*(_run_site(name, fn, t, site_timeout, emit) for (name, fn), t in zip(sites, site_tried)))
+    for part, t in zip(parts, site_tried):
+        out.extend(part)
+        tried.extend(t)
+    # Secondary hop fallback if still empty for christianlib scope with a query
+    if not out and scope in ("all", "christianlib", "christian_lib") and query:
+        try:
+            async with POOL.page() as page:
+                sec = await _secondary_hop_fallback(page, query, max_follow, tried, on_item=emit)
+            if sec:
+                out.extend(sec)
+        except Exception as e:
+            tried.append("error:secondary")
+            logging.getLogger("uvicorn.error").warning("LIB: secondary hop error %s", e)
+
+    DETAIL_PAGES.observe(navs.get("detail", 0))
+    for t in tried:
+        kind, _, where = t.partition(":")
+        if kind in ("error", "timeout") and where:
+            SCRAPE_ERRORS.inc(site=where, kind=kind)
+        STAGES.inc(stage=t)
+    # sanitize + precomputed match fields (not part of the Book response)
+    out = [_clean(it) for it in _dedup(out)]
+    return out, tried
+
+
+_BG_TASKS: set = set()
+_REFRESH_FAILED: Dict[str, float] = {}  # cache key -> time of the last failed stale refresh
+
+
+def _spawn(coro) -> None:
+    """Fire-and-forget with a strong reference until the task finishes."""
+    task = asyncio.ensure_future(coro)
+    _BG_TASKS.add(task)
+    task.add_done_callback(_bg_done)
+
+
+def _bg_done(task: "asyncio.Task[Any]") -> None:
+    _BG_TASKS.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log.warning("BG: task failed %s", task.exception())
+
+
+async def _refresh_stale(cache_key: str, fill) -> None:
+    """Background refresh of a stale entry; a failure (nothing found, or an
+    error such as Overloaded) starts the key's backoff."""
+    ok = False
+    try:
+        (out, _), _ = await singleflight.do(cache_key, fill)
+        ok = bool(out)
+    finally:
+        if ok:
+            _REFRESH_FAILED.pop(cache_key, None)
+        else:
+            now = time.time()
+            for k in [k for k, t in _REFRESH_FAILED.items() if now - t > STALE_REFRESH_BACKOFF_SEC]:
+                del _REFRESH_FAILED[k]
+            _REFRESH_FAILED[cache_key] = now
+
+
 async def search_books(
-    query: Optional[str], site: Optional[str], max_pages: int, max_follow: int
-) -> Tuple[List[Dict[str, Any]], bool, List[str]]:
+    query: Optional[str],
+    site: Optional[str],
+    max_pages: int,
+    max_follow: int,
+    on_item: Optional[Callable[[Dict[str, Any]], None]] = None,
+    site_timeout: float = SITE_TIMEOUT_SEC,
+) -> Tuple[List[Dict[str, Any]], bool, List[str], bool]:
     """Orchestrate scrapers + cache + fallback.
 
-    Returns: (items, cached_flag, tried_selectors)
+    Concurrent identical misses are coalesced on the cache key so only one
+    crawl runs; joiners get the same items and a "coalesced" marker in tried.
+    Entries past the soft TTL are served immediately (stale=True) while one
+    background crawl refreshes them; after a failed refresh the key is not
+    retried for STALE_REFRESH_BACKOFF_SEC. Queries matching the local catalog are
+    answered from its index without a crawl when every source in scope has a
+    finished full crawl. Clean empty crawls are remembered briefly
+    in the negative cache so repeated misses skip the crawl.
+    Crawls go through admission control; when it is saturated an entry past
+    its hard TTL (grace period) is served instead, else Overloaded propagates.
+
+    `on_item` streams records as a live crawl run by this caller finds them;
+    cache/catalog hits and coalesced joiners only get the returned list.
+    `site_timeout` is the per-site deadline of that crawl (longer for jobs).
+
+    Returns: (items, cached_flag, tried_selectors, stale_flag)
     """
-    tried: List[str] = []
     version = "1"  # bump when logic changes materially
     cache_key = daycache.make_key(site, query, max_pages, max_follow, version)
-    cached = daycache.get(cache_key)
-    if cached is not None:
-        return cached, True, tried
 
-    out: List[Dict[str, Any]] = []
-    scope = (site or "all").lower()
-    async with PWSession() as sess:
-        page = await sess.new_page()
-        # Coptic
-        if scope in ("all", "coptic", "coptic-treasures", "coptic_treasures"):
-            try:
-                part = await scraper_coptic.scrape(page, query, max_pages, tried)
-                out.extend(part)
-            except Exception as e:
-                tried.append("error:coptic")
-                logging.getLogger("uvicorn.error").warning("LIB: coptic error %s", e)
-        # ChristianLib
-        if scope in ("all", "christianlib", "christian_lib"):
-            try:
-                part = await scraper_christianlib.scrape(page, query, max_pages, tried, max_follow=max_follow)
-                out.extend(part)
-            except Exception as e:
-                tried.append("error:christianlib")
-                logging.getLogger("uvicorn.error").warning("LIB: christianlib error %s", e)
-        # Secondary hop fallback if still empty for christianlib scope with a query
-        if not out and scope in ("all", "christianlib", "christian_lib") and query:
-            try:
-                sec_page = await sess.new_page()
-                sec = await _secondary_hop_fallback(sec_page, query, max_follow, tried)
-                await sec_page.close()
-                if sec:
-                    out.extend(sec)
-            except Exception as e:
-                tried.append("error:secondary")
-                logging.getLogger("uvicorn.error").warning("LIB: secondary hop error %s", e)
+    def _make_fill(on_item, site_timeout: float):
+        async def _fill() -> Tuple[List[Dict[str, Any]], List[str]]:
+            async with admission.slot():
+                with tracing.span("scrape", site=site or "all", max_pages=max_pages, max_follow=max_follow):
+                    out, tried = await _scrape(query, site, max_pages, max_follow, site_timeout=site_timeout, on_item=on_item)
+            if out:
+                daycache.set(cache_key, out)
+                catalog.add(out)
+            elif not any(t.startswith(("error:", "timeout:")) for t in tried):
+                # a clean empty crawl; failures are retried on the next request
+                daycache.set_negative(cache_key, tried)
+            return out, tried
+
+        return _fill
+
+    with tracing.span("cache.lookup") as sp:
+        hit = daycache.lookup(cache_key)
+        if sp:
+            sp.set(hit=hit is not None, stale=bool(hit and hit[1]))
+    if hit is not None:
+        data, stale = hit
+        if stale and time.time() - _REFRESH_FAILED.get(cache_key, 0.0) > STALE_REFRESH_BACKOFF_SEC:
+            # an interactive-sized crawl that outlives this caller: no streaming
+            # into its (finished) response and no job-length site deadline
+            _spawn(_refresh_stale(cache_key, _make_fill(None, SITE_TIMEOUT_SEC)))
+        return data, True, [], stale
+    with tracing.span("catalog.search") as sp:
+        indexed = catalog.search(query, site) if query else []
+        if sp:
+            sp.set(results=len(indexed))
+    if indexed:
+        return indexed, True, ["catalog"], False
+    with tracing.span("cache.negative"):
+        neg_tried = daycache.get_negative(cache_key)
+    if neg_tried is not None:
+        return [], True, neg_tried + ["negative_cache"], False
+    # only requests that reach a live crawl spend the client's scrape budget
+    ratelimit.check("miss")
 
-    out = _dedup(out)
-    # sanitize
-    for it in out:
-        for k in ("title", "author", "source", "details_url", "download_url", "cover_image"):
-            if it.get(k):
-                it[k] = str(it[k]).strip()
-    if out:
-        daycache.set(cache_key, out)
-    return out, False, tried
+    try:
+        with tracing.span("crawl") as sp:
+            (out, tried), shared = await singleflight.do(cache_key, _make_fill(on_item, site_timeout))
+            if sp:
+                sp.set(coalesced=shared, items=len(out))
+    except admission.Overloaded:
+        expired = daycache.get_expired(cache_key)
+        if expired:
+            return expired, True, ["overloaded"], True
+        raise
+    tried = list(tried)
+    if shared:
+        tried.append("coalesced")
+    return out, False, tried, False
 
 
 log = logging.getLogger("uvicorn.error")
-app = FastAPI(title=APP_TITLE)
+
+
+async def _catalog_crawl() -> Tuple[List[Dict[str, Any]], List[str]]:
+    # no query: paginate listings; only sources whose scraper walks the whole
+    # listing (records "complete:<source>") are installed in the catalog.
+    # Counts against the jobs worker budget, so with the jobs it never holds
+    # the last admission slot; like any live crawl it also holds an admission
+    # slot (so admitted crawls still find free pages) and waits out saturation.
+    async with jobs.background_slot():
+        while True:
+            try:
+                async with admission.slot():
+                    return await _scrape(
+                        None, "all", catalog.CATALOG_CRAWL_PAGES, 1000, site_timeout=catalog.CATALOG_CRAWL_TIMEOUT_SEC
+                    )
+            except admission.Overloaded as e:
+                await asyncio.sleep(e.retry_after)
+
+
+async def _run_job(params: Dict[str, Any], on_item: Callable[[Dict[str, Any]], None]):
+    # jobs have no client waiting on a socket: sit out saturation instead of failing
+    while True:
+        try:
+            return await search_books(
+                params.get("q"), params.get("site"), params["max_pages"], params["max_follow"],
+                on_item=on_item, site_timeout=jobs.JOBS_SITE_TIMEOUT_SEC,
+            )
+        except admission.Overloaded as e:
+            await asyncio.sleep(e.retry_after)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Warm the shared browser once per process; a launch failure is not fatal,
+    # the pool retries lazily on the first /api/library miss.
+    try:
+        await POOL.start()
+    except Exception as e:
+        log.warning("POOL: warm start failed %s", e)
+    log.info("CATALOG: loaded docs=%d", catalog.load())
+    tasks = [
+        asyncio.create_task(daycache.purge_loop()),
+        asyncio.create_task(ratelimit.sync_loop()),
+        asyncio.create_task(catalog.refresh_loop(_catalog_crawl)),
+        *jobs.start(_run_job),
+    ]
+    try:
+        yield
+    finally:
+        for t in tasks:
+            t.cancel()
+        try:
+            catalog.flush()
+        except OSError as e:
+            log.warning("CATALOG: save failed %s", e)
+        await POOL.stop()
+        await robots.close()
+
+
+app = FastAPI(title=APP_TITLE, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -249,29 +511,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _rate_limited(e: ratelimit.RateLimited) -> JSONResponse:
+    retry_after = max(1, int(e.retry_after + 0.999))
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(retry_after)},
+        content={
+            "error": "rate_limited",
+            "hint": f"Too many {'live searches' if e.budget == 'miss' else 'requests'}; retry in {retry_after}s",
+            "items": [],
+            "count": 0,
+            "took_ms": 0,
+            "cached": False,
+        },
+    )
+
+
+def _overloaded(e: admission.Overloaded) -> JSONResponse:
+    retry_after = max(1, int(e.retry_after + 0.999))
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(retry_after)},
+        content={
+            "error": "overloaded",
+            "hint": f"Too many live searches in progress; retry in {retry_after}s",
+            "items": [],
+            "count": 0,
+            "took_ms": 0,
+            "cached": False,
+        },
+    )
+
+
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):  # type: ignore[override]
-    if RATE_LIMIT_MAX > 0 and request.url.path == "/api/library":
+    if request.url.path.startswith("/api/library"):
         ip = request.client.host if request.client else "unknown"
-        now = _rl_now()
-        count, start = _RL_STORE.get(ip, (0, now))
-        if now - start > RATE_LIMIT_WINDOW:
-            count, start = 0, now
-        if count >= RATE_LIMIT_MAX:
-            retry_after = max(1, int(start + RATE_LIMIT_WINDOW - now))
-            return JSONResponse(
-                status_code=429,
-                headers={"Retry-After": str(retry_after)},
-                content={
-                    "error": "rate_limited",
-                    "hint": f"Too many requests from {ip}. Limit {RATE_LIMIT_MAX}/{RATE_LIMIT_WINDOW}s",
-                    "items": [],
-                    "count": 0,
-                    "took_ms": 0,
-                    "cached": False,
-                },
-            )
-        _RL_STORE[ip] = (count + 1, start)
+        ratelimit.CLIENT.set(ip)
+        # job polling is cheap and frequent; everything else spends the hit budget
+        if not (request.url.path.startswith("/api/library/jobs/") and request.method == "GET"):
+            try:
+                ratelimit.check("hit", ip)
+            except ratelimit.RateLimited as e:
+                return _rate_limited(e)
     return await call_next(request)
 
 
@@ -281,11 +563,32 @@ async def api_library(
     site: Optional[str] = Query(default=None, description="site=coptic|christianlib|all"),
     max_pages: int = Query(default=2, ge=1, le=5, description="max pages per site when q omitted"),
     max_follow: int = Query(default=6, ge=0, le=10, description="max detail pages for deep/secondary hop"),
+    debug: Optional[str] = Query(default=None, description="debug=timings adds the span breakdown"),
 ):
+    want_timings = "timings" in (debug or "").split(",")
+    with tracing.trace("GET /api/library", force=want_timings, q=q or "", site=site or "all") as tr:
+        resp = await _library(q, site, max_pages, max_follow)
+        timings = tracing.breakdown(tr) if want_timings else None
+    if timings is None:
+        return resp
+    body = json.loads(resp.body)
+    body["timings"] = timings
+    headers = {k: v for k, v in resp.headers.items() if k.lower() not in ("content-length", "content-type")}
+    return JSONResponse(status_code=resp.status_code, headers=headers, content=body)
+
+
+async def _library(q: Optional[str], site: Optional[str], max_pages: int, max_follow: int) -> JSONResponse:
     t0 = time.time()
     log.info("LIB: start q=%s site=%s", q, site)
     try:
-        data, cached_flag, tried = await search_books(q, site, max_pages, max_follow)
+        try:
+            data, cached_flag, tried, stale = await search_books(q, site, max_pages, max_follow)
+        except ratelimit.RateLimited as e:
+            log.info("LIB: rate limited budget=%s", e.budget)
+            return _rate_limited(e)
+        except admission.Overloaded as e:
+            log.warning("LIB: overloaded reason=%s", e.reason)
+            return _overloaded(e)
         took = time.time() - t0
         if data:
             log.info("LIB: ok items=%d took=%.1fs", len(data), took)
@@ -295,12 +598,13 @@ async def api_library(
                     count=len(data),
                     took_ms=int(took * 1000),
                     cached=cached_flag,
+                    stale=stale,
                 ).dict()
             )
         log.info("LIB: empty tried=%s took=%.1fs", tried, took)
         return JSONResponse(
             content=LibraryResponse(
-                items=[], count=0, took_ms=int(took * 1000), cached=False, hint=f"no matches; tried={tried}"
+                items=[], count=0, took_ms=int(took * 1000), cached=cached_flag, hint=f"no matches; tried={tried}"
             ).dict()
         )
     except Exception as e:
@@ -319,9 +623,205 @@ async def api_library(
         )
 
 
+def _frame(fmt: str, event: str, data: Dict[str, Any]) -> str:
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return json.dumps({"type": event, **data}, ensure_ascii=False) + "\n"
+
+
+@app.get("/api/library/stream")
+async def api_library_stream(
+    q: Optional[str] = Query(default=None, description="search query"),
+    site: Optional[str] = Query(default=None, description="site=coptic|christianlib|all"),
+    max_pages: int = Query(default=2, ge=1, le=5, description="max pages per site when q omitted"),
+    max_follow: int = Query(default=6, ge=0, le=10, description="max detail pages for deep/secondary hop"),
+    format: str = Query(default="ndjson", pattern="^(ndjson|sse)$", description="ndjson|sse"),
+):
+    """Streaming /api/library: one `item` frame per book ({source, item}) as
+    soon as a scraper yields it, then a `summary` frame
+    ({count, took_ms, cached, stale, tried}) or an `error` frame."""
+    t0 = time.time()
+    log.info("LIB: stream start q=%s site=%s", q, site)
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.ensure_future(search_books(q, site, max_pages, max_follow, on_item=queue.put_nowait))
+    task.add_done_callback(lambda _t: queue.put_nowait(None))
+
+    async def frames():
+        sent: set = set()
+
+        def item_frame(it: Dict[str, Any]) -> Optional[str]:
+            key = _item_key(it)
+            if key in sent:
+                return None
+            sent.add(key)
+            return _frame(format, "item", {"source": it.get("source"), "item": Book(**it).dict()})
+
+        try:
+            while True:
+                it = await queue.get()
+                if it is None:
+                    break
+                frame = item_frame(it)
+                if frame:
+                    yield frame
+            try:
+                data, cached_flag, tried, stale = task.result()
+            except ratelimit.RateLimited as e:
+                yield _frame(format, "error", {"error": "rate_limited", "hint": str(e), "retry_after": int(e.retry_after + 0.999)})
+                return
+            except admission.Overloaded as e:
+                yield _frame(format, "error", {"error": "overloaded", "hint": str(e), "retry_after": int(e.retry_after + 0.999)})
+                return
+            except Exception as e:
+                log.warning("LIB: stream fail err=%s", e)
+                yield _frame(format, "error", {"error": "LIB_ERROR", "hint": str(e), "took_ms": int((time.time() - t0) * 1000)})
+                return
+            # cache/catalog hits and coalesced joiners arrive here in one go
+            for it in data:
+                frame = item_frame(it)
+                if frame:
+                    yield frame
+            took = time.time() - t0
+            log.info("LIB: stream done items=%d took=%.1fs", len(sent), took)
+            yield _frame(
+                format,
+                "summary",
+                {"count": len(sent), "took_ms": int(took * 1000), "cached": cached_flag, "stale": stale, "tried": tried},
+            )
+        finally:
+            # client gone: stop waiting (a shared crawl still finishes and fills the cache)
+            if not task.done():
+                task.cancel()
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(frames(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _job_view(job: Dict[str, Any], since: int = 0) -> Dict[str, Any]:
+    end = job["finished_at"] or time.time()
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "position": jobs.position(job["id"]),
+        "params": job["params"],
+        "count": len(job["items"]),
+        "items": [Book(**b).dict() for b in job["items"][since:]],
+        "since": since,
+        "cached": job["cached"],
+        "stale": job["stale"],
+        "tried": job["tried"],
+        "error": job["error"],
+        "took_ms": int((end - (job["started_at"] or end)) * 1000),
+        "waited_ms": int(((job["started_at"] or end) - job["submitted_at"]) * 1000),
+    }
+
+
+@app.post("/api/library/jobs", status_code=202)
+async def submit_library_job(req: LibraryJobRequest):
+    """Queue a (deep) search; poll GET /api/library/jobs/{job_id}."""
+    try:
+        # workers run outside the request, so the crawl budget is charged here
+        ratelimit.check("miss")
+        job = jobs.submit(req.dict())
+    except ratelimit.RateLimited as e:
+        return _rate_limited(e)
+    except jobs.QueueFull as e:
+        return JSONResponse(status_code=503, headers={"Retry-After": "30"}, content={"error": "jobs_busy", "hint": str(e)})
+    log.info("JOBS: queued %s q=%s site=%s", job["id"], req.q, req.site)
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "position": jobs.position(job["id"]),
+        "poll": f"/api/library/jobs/{job['id']}",
+    }
+
+
+@app.get("/api/library/jobs/{job_id}")
+async def get_library_job(job_id: str, since: int = Query(default=0, ge=0, description="skip the first `since` items")):
+    """Status, progress and items found so far (final de-duplicated list once done)."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown or expired job")
+    return _job_view(job, since)
+
+
+def _collect_metrics():
+    """Gauges/counters already tracked by the component stats() functions."""
+    cache = daycache.stats()
+    yield (
+        "daycache_lookups_total",
+        "counter",
+        "daycache lookups by result (stale and grace are also counted as hit/miss)",
+        [({"result": r}, cache[k]) for r, k in (("hit", "hits"), ("miss", "misses"), ("stale", "stale"), ("negative", "negative_hits"), ("grace", "grace_hits"))],
+    )
+    yield ("daycache_entries", "gauge", "Entries in the result cache", [({}, cache["entries"])])
+    yield ("daycache_bytes", "gauge", "JSON-encoded size of cached results", [({}, cache["bytes"])])
+    yield ("daycache_evictions_total", "counter", "LRU evictions", [({}, cache["evictions"])])
+    pool = POOL.stats()
+    yield ("browser_pool_slots", "gauge", "Browser pool slots by state", [({"state": "in_use"}, pool["in_use"]), ({"state": "idle"}, pool["idle"])])
+    yield ("browser_pool_size", "gauge", "Configured browser pool size", [({}, pool["size"])])
+    yield ("browser_pool_connected", "gauge", "1 when the pooled Chromium is connected", [({}, pool["connected"])])
+    yield ("browser_launches_total", "counter", "Chromium launches", [({}, pool["launches"])])
+    yield ("browser_slots_recycled_total", "counter", "Pool slots recycled", [({}, pool["recycled"])])
+    rl = ratelimit.stats()
+    yield (
+        "ratelimit_rejections_total",
+        "counter",
+        "Requests rejected by the per-IP limiter",
+        [({"budget": b}, rl.get(f"rejected_{b}", 0)) for b in rl["budgets"]],
+    )
+    yield ("ratelimit_keys", "gauge", "Client keys tracked by the limiter", [({}, rl["keys"])])
+    adm = admission.stats()
+    yield ("admission_crawls", "gauge", "Live crawls by state", [({"state": "active"}, adm["active"]), ({"state": "waiting"}, adm["waiting"])])
+    yield (
+        "admission_rejections_total",
+        "counter",
+        "Crawls refused by admission control",
+        [({"reason": "queue_full"}, adm["rejected_queue_full"]), ({"reason": "timeout"}, adm["rejected_timeout"])],
+    )
+    yield ("admission_wait_ms_avg", "gauge", "Average admission queue wait", [({}, adm["avg_wait_ms"])])
+    pages = page_policy.stats()
+    yield (
+        "page_subrequests_total",
+        "counter",
+        "Sub-resource requests seen by the page policy",
+        [({"action": "blocked"}, pages["blocked_requests"]), ({"action": "allowed"}, pages["allowed_requests"])],
+    )
+    hosts = hostrate.stats()
+    yield ("hostrate_acquired_total", "counter", "Requests spaced by the per-host scheduler", [({"host": h}, b["acquired"]) for h, b in hosts.items()])
+    yield ("hostrate_waited_seconds_total", "counter", "Time spent waiting for a host turn", [({"host": h}, b["waited_sec"]) for h, b in hosts.items()])
+    cat = catalog.stats()
+    yield ("catalog_docs", "gauge", "Books in the local catalog", [({}, cat["docs"])])
+    yield ("catalog_built_at_seconds", "gauge", "Unix time of the last catalog crawl", [({}, cat["built_at"])])
+    yield ("catalog_source_complete", "gauge", "1 when the source has a finished full crawl", [({"source": src}, int(src in cat["complete"])) for src in catalog.SOURCES])
+    jb = jobs.stats()
+    yield (
+        "library_jobs",
+        "gauge",
+        "Background search jobs by status",
+        [({"status": st}, jb.get(st, 0)) for st in ("queued", "running", "done", "failed")],
+    )
+
+
+metrics.register_collector(_collect_metrics)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/health")
 async def health():
-    return {"ok": True, "service": APP_TITLE}
+    # liveness probe: in-memory state only; cache, catalog, limiter and
+    # per-host detail (some of it SQLite queries) is exported by /metrics
+    return {
+        "ok": True,
+        "service": APP_TITLE,
+        "browser": POOL.stats(),
+        "admission": admission.stats(),
+        "jobs": jobs.stats(),
+    }
 
 
 _REPORTS: List[Dict[str, Any]] = []
@@ -0,0 +1,133 @@
+"""Minimal Prometheus metrics (text exposition format 0.0.4), process local.
+
+Key design:
+ - Counter / Histogram objects registered at import time by the modules that
+   own the measurement (main, page_policy); labels are keyword arguments
+ - Values that other modules already count in their stats() (daycache,
+   browser pool, rate limiter, admission) are exported through collectors:
+   callables returning samples at scrape time, so there is one source of truth
+ - render() produces the /metrics body; no client library dependency
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 45.0, 90.0)
+
+LabelKey = Tuple[str, ...]
+# collector -> [(name, type, help, [(labels, value), ...]), ...]
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+_lock = threading.Lock()
+_METRICS: List["_Metric"] = []
+_COLLECTORS: List[Callable[[], Iterable[Family]]] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _num(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        with _lock:
+            _METRICS.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _head(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self._head()
+        for key, v in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(list(zip(self.labelnames, key)))} {_num(v)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with _lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = self._head()
+        for key, (counts, total) in sorted(self._values.items()):
+            pairs = list(zip(self.labelnames, key))
+            cum = 0
+            for le, n in zip(self.buckets + (math.inf,), counts):
+                cum += n
+                lines.append(f"{self.name}_bucket{_labels(pairs + [('le', _num(le))])} {cum}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_num(total[0])}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {cum}")
+        return lines
+
+
+def register_collector(fn: Callable[[], Iterable[Family]]) -> None:
+    """fn() -> [(name, "gauge"|"counter", help, [(labels, value), ...]), ...]"""
+    _COLLECTORS.append(fn)
+
+
+def render() -> str:
+    lines: List[str] = []
+    with _lock:
+        metrics = list(_METRICS)
+    for m in metrics:
+        lines.extend(m.render())
+    for fn in _COLLECTORS:
+        try:
+            families = list(fn())
+        except Exception:
+            continue
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                lines.append(f"{name}{_labels(sorted(labels.items()))} {_num(value)}")
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class Book(BaseModel):
     title: str
@@ -10,6 +10,7 @@ class Book(BaseModel):
     download_url: str | None = None
     cover_image: str | None = None
     pages: int | None = None
+    size_mb: float | None = None
     year: int | None = None
     category: str | None = None
     lang: str | None = None
@@ -19,4 +20,12 @@ class LibraryResponse(BaseModel):
     count: int
     took_ms: int
     cached: bool
+    stale: bool = False
     hint: Optional[str] = None
+
+class LibraryJobRequest(BaseModel):
+    q: Optional[str] = None
+    site: Optional[str] = None
+    # jobs are not bound by a client timeout, so deeper crawls are allowed
+    max_pages: int = Field(default=5, ge=1, le=20)
+    max_follow: int = Field(default=10, ge=0, le=50)
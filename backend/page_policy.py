@@ -0,0 +1,124 @@
+"""Request interception and navigation policy for scraper pages.
+
+Key design:
+ - Installed once per BrowserContext (so worker pages opened with
+   context.new_page() inherit it)
+ - Aborts requests by resource type (PAGE_BLOCK_TYPES, default images, media,
+   fonts, stylesheets) and any request to a host outside PAGE_ALLOW_HOSTS
+   (the scraped sites; subdomains included), which drops analytics and ads
+ - goto() navigates with wait_until=PAGE_WAIT_UNTIL (default
+   "domcontentloaded") and logs per-navigation timing plus blocked request
+   counts; PAGE_BLOCK_RESOURCES=0 disables blocking to get a baseline
+ - goto() first takes the host's turn from hostrate, so every navigation is
+   rate limited by the shared per-host scheduler
+ - Each navigation is observed in the scraper_navigation_seconds histogram
+   (labelled by stage: listing / detail / page) and counted per request via
+   the REQUEST_NAVS contextvar
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import time
+from typing import Any, Dict, FrozenSet, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Page, Route
+
+try:  # imported as backend.page_policy by the backend.scraper package
+    from . import hostrate, metrics, tracing
+except ImportError:
+    import hostrate
+    import metrics
+    import tracing
+
+BLOCK_RESOURCES = os.getenv("PAGE_BLOCK_RESOURCES", "1") not in ("0", "false", "False")
+BLOCK_TYPES: FrozenSet[str] = frozenset(
+    t.strip() for t in os.getenv("PAGE_BLOCK_TYPES", "image,media,font,stylesheet").split(",") if t.strip()
+)
+ALLOW_HOSTS: FrozenSet[str] = frozenset(
+    h.strip().lower() for h in os.getenv("PAGE_ALLOW_HOSTS", "coptic-treasures.com,christianlib.com").split(",") if h.strip()
+)
+WAIT_UNTIL = os.getenv("PAGE_WAIT_UNTIL", "domcontentloaded")
+
+log = logging.getLogger("uvicorn.error")
+
+_STATS = {"navigations": 0, "nav_ms": 0.0, "blocked": 0, "allowed": 0}
+
+NAV_SECONDS = metrics.Histogram(
+    "scraper_navigation_seconds", "Page navigation latency (excluding rate-limit wait)", labels=("stage", "outcome")
+)
+# stage -> navigation count for the current crawl (set by the caller, shared with its tasks)
+REQUEST_NAVS: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("request_navs", default=None)
+
+
+def host_allowed(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    if not host or not ALLOW_HOSTS:
+        return True
+    return any(host == h or host.endswith("." + h) for h in ALLOW_HOSTS)
+
+
+def should_block(resource_type: str, url: str) -> bool:
+    if not BLOCK_RESOURCES or url.startswith(("data:", "blob:")):
+        return False
+    return resource_type in BLOCK_TYPES or not host_allowed(url)
+
+
+async def _handle(route: Route) -> None:
+    req = route.request
+    if should_block(req.resource_type, req.url):
+        _STATS["blocked"] += 1
+        await route.abort()
+    else:
+        _STATS["allowed"] += 1
+        # fallback = continue to the network unless an earlier-registered
+        # route (e.g. the benchmark fixture server) also handles the URL
+        await route.fallback()
+
+
+async def install(context: BrowserContext) -> None:
+    """Route every request of the context through the block policy."""
+    if BLOCK_RESOURCES:
+        await context.route("**/*", _handle)
+
+
+async def goto(page: Page, url: str, *, stage: str = "page", **kwargs: Any):
+    """page.goto with the lean wait policy and a timing log line.
+
+    `stage` (listing / detail / page) only labels the metrics.
+    """
+    kwargs.setdefault("wait_until", WAIT_UNTIL)
+    with tracing.span("hostrate.wait") as sp:
+        waited = await hostrate.acquire(url)
+        if sp:
+            sp.set(waited_sec=round(waited, 3))
+    counts = REQUEST_NAVS.get()
+    if counts is not None:
+        counts[stage] = counts.get(stage, 0) + 1
+    blocked0, t0 = _STATS["blocked"], time.perf_counter()
+    outcome = "error"
+    try:
+        with tracing.span("navigate", stage=stage, url=url):
+            resp = await page.goto(url, **kwargs)
+        outcome = "ok"
+        return resp
+    finally:
+        took = (time.perf_counter() - t0) * 1000
+        _STATS["navigations"] += 1
+        _STATS["nav_ms"] += took
+        NAV_SECONDS.observe(took / 1000, stage=stage, outcome=outcome)
+        log.info("NAV: %s wait=%s took=%.0fms blocked=%d", url, kwargs["wait_until"], took, _STATS["blocked"] - blocked0)
+
+
+def stats() -> Dict[str, Any]:
+    n = _STATS["navigations"]
+    return {
+        "blocking": BLOCK_RESOURCES,
+        "wait_until": WAIT_UNTIL,
+        "navigations": n,
+        "avg_nav_ms": round(_STATS["nav_ms"] / n, 1) if n else None,
+        "blocked_requests": _STATS["blocked"],
+        "allowed_requests": _STATS["allowed"],
+    }
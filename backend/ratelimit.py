@@ -0,0 +1,207 @@
+"""Per-client rate limiting (GCRA) with bounded state.
+
+Key design:
+ - GCRA ("leaky bucket as a meter"): one theoretical arrival time (TAT) per
+   key; a budget of N requests per window W admits at most N back-to-back
+   and then one every W/N seconds, so there is no fixed-window edge where
+   2x the limit gets through
+ - Two budgets per client IP:
+     hit   every /api/library* request (RATE_LIMIT_HIT_MAX per window)
+     miss  requests that start a live crawl (RATE_LIMIT_MAX per window),
+           charged in search_books via the CLIENT contextvar, so cheap
+           cached answers do not burn the expensive scrape quota
+ - Keys whose TAT is in the past are fully replenished and are evicted by
+   sweep(); the memory store is also capped at RATE_LIMIT_MAX_KEYS
+ - Storage chosen by RATE_LIMIT_BACKEND:
+     memory  process local (default)
+     sqlite  file at RATE_LIMIT_PATH shared by every worker on the host
+ - The sqlite store decides from an in-memory view and merges it with the
+   file every RATE_LIMIT_SYNC_SEC in a thread (sync_loop), so no request
+   waits on the file lock. Trade-off: between syncs each worker only sees
+   its own charges, so a client spread over W workers can get up to W times
+   its budget for one sync interval before the shared TAT catches up
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW_SEC", "300"))  # seconds
+RATE_LIMIT_MISS_MAX = int(os.getenv("RATE_LIMIT_MAX", "30"))  # live crawls per window
+RATE_LIMIT_HIT_MAX = int(os.getenv("RATE_LIMIT_HIT_MAX", "300"))  # any request per window
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "50000"))
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", str(Path(__file__).resolve().parent / "cache" / "ratelimit.sqlite3"))
+RATE_LIMIT_SYNC_SEC = float(os.getenv("RATE_LIMIT_SYNC_SEC", "1"))
+SWEEP_INTERVAL_SEC = 60
+
+BUDGETS: Dict[str, int] = {"hit": RATE_LIMIT_HIT_MAX, "miss": RATE_LIMIT_MISS_MAX}
+
+# client identity of the current request (set by the HTTP middleware)
+CLIENT: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("ratelimit_client", default=None)
+
+_STATS = {"allowed": 0, "rejected_hit": 0, "rejected_miss": 0, "evicted": 0}
+
+
+class RateLimited(Exception):
+    def __init__(self, budget: str, retry_after: float):
+        super().__init__(f"{budget} budget exhausted, retry in {retry_after:.0f}s")
+        self.budget = budget
+        self.retry_after = retry_after
+
+
+class MemoryStore:
+    """Process-local key -> TAT, oldest-updated first."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+
+    def update(self, key: str, now: float, interval: float, window: float) -> Tuple[bool, float]:
+        tat = max(self._tat.get(key, now), now)
+        new_tat = tat + interval
+        if new_tat - now > window:
+            return False, new_tat - now - window
+        self._tat[key] = new_tat
+        self._tat.move_to_end(key)
+        while len(self._tat) > self.max_keys:
+            self._tat.popitem(last=False)
+            _STATS["evicted"] += 1
+        return True, 0.0
+
+    def sweep(self, now: float) -> int:
+        idle = [k for k, tat in self._tat.items() if tat <= now]
+        for k in idle:
+            del self._tat[k]
+        return len(idle)
+
+    def size(self) -> int:
+        return len(self._tat)
+
+
+class SqliteStore(MemoryStore):
+    """TATs shared through a WAL SQLite file.
+
+    update() only touches the in-memory view and logs the charge; sync()
+    (called off the event loop) replays the logged charges onto the shared
+    TATs in one BEGIN IMMEDIATE transaction, drops expired rows and pulls
+    the other workers' TATs into the view. size() counts this worker's view.
+    """
+
+    def __init__(self, path: str, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        super().__init__(max_keys)
+        self._lock = threading.Lock()  # view and log are shared with the sync thread
+        self._charges: Dict[str, List[Tuple[float, float]]] = {}  # key -> [(now, interval)] since the last sync
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS tat (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tat_tat ON tat (tat)")
+
+    def update(self, key: str, now: float, interval: float, window: float) -> Tuple[bool, float]:
+        with self._lock:
+            ok, retry_after = super().update(key, now, interval, window)
+            if ok:
+                self._charges.setdefault(key, []).append((now, interval))
+        return ok, retry_after
+
+    def sweep(self, now: float) -> int:
+        with self._lock:
+            return super().sweep(now)
+
+    def sync(self, now: float) -> None:
+        with self._lock:
+            charges, self._charges = self._charges, {}
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for key, log in charges.items():
+                row = self._db.execute("SELECT tat FROM tat WHERE key = ?", (key,)).fetchone()
+                tat = row[0] if row else 0.0
+                for t, interval in log:  # as if every worker's checks had been serialized
+                    tat = max(tat, t) + interval
+                self._db.execute("INSERT OR REPLACE INTO tat (key, tat) VALUES (?, ?)", (key, tat))
+            self._db.execute("DELETE FROM tat WHERE tat <= ?", (now,))
+            shared = self._db.execute("SELECT key, tat FROM tat").fetchall()
+        finally:
+            self._db.execute("COMMIT")
+        with self._lock:
+            for key, tat in shared:
+                for t, interval in self._charges.get(key, ()):  # charged while syncing
+                    tat = max(tat, t) + interval
+                if tat > self._tat.get(key, 0.0):
+                    self._tat[key] = tat
+            while len(self._tat) > self.max_keys:
+                self._tat.popitem(last=False)
+                _STATS["evicted"] += 1
+
+
+log = logging.getLogger("uvicorn.error")
+
+
+def _make_store():
+    if RATE_LIMIT_BACKEND == "sqlite":
+        return SqliteStore(RATE_LIMIT_PATH)
+    return MemoryStore()
+
+
+_store = _make_store()
+_last_sweep = 0.0
+
+
+def configure(store) -> None:
+    """Swap the storage (update/sweep/size)."""
+    global _store
+    _store = store
+
+
+def check(budget: str, client: Optional[str] = None) -> None:
+    """Charge one request to `client`'s budget; raises RateLimited when spent.
+
+    `client` defaults to CLIENT; with no client (background work) nothing is charged.
+    """
+    global _last_sweep
+    client = client if client is not None else CLIENT.get()
+    limit = BUDGETS.get(budget, 0)
+    if client is None or limit <= 0:
+        return
+    now = time.time()
+    if now - _last_sweep > SWEEP_INTERVAL_SEC:
+        _last_sweep = now
+        _STATS["evicted"] += _store.sweep(now)
+    ok, retry_after = _store.update(f"{budget}|{client}", now, RATE_LIMIT_WINDOW / limit, RATE_LIMIT_WINDOW)
+    if not ok:
+        _STATS["rejected_" + budget] = _STATS.get("rejected_" + budget, 0) + 1
+        raise RateLimited(budget, retry_after)
+    _STATS["allowed"] += 1
+
+
+async def sync_loop(interval: float = RATE_LIMIT_SYNC_SEC):
+    """Background task: merge a shared store with the file every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        sync = getattr(_store, "sync", None)
+        if sync is None:
+            continue
+        try:
+            await asyncio.to_thread(sync, time.time())
+        except Exception as e:
+            log.warning("RATELIMIT: sync failed %s", e)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "backend": type(_store).__name__,
+        "window_sec": RATE_LIMIT_WINDOW,
+        "budgets": dict(BUDGETS),
+        "keys": _store.size(),
+        **_STATS,
+    }
@@ -1,46 +1,160 @@
-"""robots.txt fetch + allow/deny evaluation (minimal).
+"""robots.txt fetch + allow/deny evaluation (async, cached).
 
-We only need to confirm disallow rules for the user-agent '*'. A polite UA string
-with contact email should be used by the Playwright context.
+Key design:
+ - Fetched with a shared httpx.AsyncClient, never blocking the event loop
+ - One fetch per host at a time (singleflight); parsed rules are cached for
+   ROBOTS_TTL_SEC, failures (network / 5xx) only for ROBOTS_ERROR_TTL_SEC so
+   a transient error does not mean "allow all" forever
+ - The group whose User-agent equals our product token (ROBOTS_AGENT,
+   case-insensitive, whole token per RFC 9309) wins over '*'
+ - Allow/Disallow use RFC 9309 longest-match (ties go to Allow); plain
+   prefix rules live in a character trie walked once per path, so a check
+   costs O(path length); rules with '*' or '$' are precompiled regexes
+ - Crawl-delay is exposed for the per-host scheduler
 """
 from __future__ import annotations
 
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
 import httpx
-from functools import lru_cache
-from typing import List
+
+import singleflight
+import tracing
+
+ROBOTS_AGENT = os.getenv("ROBOTS_AGENT", "elmafdeinbot").lower()
+ROBOTS_TTL_SEC = int(os.getenv("ROBOTS_TTL_SEC", str(24 * 60 * 60)))
+ROBOTS_ERROR_TTL_SEC = int(os.getenv("ROBOTS_ERROR_TTL_SEC", "300"))
+ROBOTS_TIMEOUT_SEC = 8.0
+
+log = logging.getLogger("uvicorn.error")
+
+
+class Rules:
+    """Compiled Allow/Disallow rules of one robots.txt group."""
+
+    def __init__(self, rules: List[Tuple[str, bool]], crawl_delay: Optional[float] = None):
+        self.crawl_delay = crawl_delay
+        self._trie: Dict[str, Any] = {}
+        self._patterns: List[Tuple[int, bool, "re.Pattern[str]"]] = []
+        for path, allow in rules:
+            if "*" in path or path.endswith("$"):
+                body = path[:-1] if path.endswith("$") else path
+                rx = ".*".join(re.escape(part) for part in body.split("*"))
+                self._patterns.append((len(path), allow, re.compile(rx + ("$" if path.endswith("$") else ""))))
+            else:
+                node = self._trie
+                for ch in path:
+                    node = node.setdefault(ch, {})
+                # Allow wins a tie with Disallow of the same length
+                node[""] = node.get("", False) or allow
+
+    def allowed(self, path: str) -> bool:
+        best_len, best_allow = -1, True
+        node = self._trie
+        if "" in node:
+            best_len, best_allow = 0, node[""]
+        for i, ch in enumerate(path):
+            node = node.get(ch)
+            if node is None:
+                break
+            if "" in node:
+                best_len, best_allow = i + 1, node[""]
+        for length, allow, rx in self._patterns:
+            if (length > best_len or (length == best_len and allow)) and rx.match(path):
+                best_len, best_allow = length, allow
+        return best_allow
+
+
+ALLOW_ALL = Rules([])
+
+
+def parse(text: str, agent: str = ROBOTS_AGENT) -> Rules:
+    """Pick the group for `agent` (else '*') and compile its rules."""
+    groups: Dict[str, Tuple[List[Tuple[str, bool]], List[float]]] = {}
+    current: List[str] = []
+    in_rules = False
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        field, value = (s.strip() for s in line.split(":", 1))
+        field = field.lower()
+        if field == "user-agent":
+            if in_rules:
+                current, in_rules = [], False
+            ua = value.lower()
+            current.append(ua)
+            groups.setdefault(ua, ([], []))
+        elif field in ("allow", "disallow") and current:
+            in_rules = True
+            if value:  # empty Disallow = allow everything
+                for ua in current:
+                    groups[ua][0].append((value, field == "allow"))
+        elif field == "crawl-delay" and current:
+            in_rules = True
+            try:
+                for ua in current:
+                    groups[ua][1].append(float(value))
+            except ValueError:
+                pass
+    agent = agent.lower()
+    # whole-token match: "User-agent: bot" must not select the group for "elmafdeinbot"
+    key = next((ua for ua in groups if ua != "*" and ua.split("/", 1)[0].strip() == agent), "*")
+    rules, delays = groups.get(key, ([], []))
+    return Rules(rules, delays[0] if delays else None)
 
 
-@lru_cache(maxsize=32)
-def fetch_robots(base: str) -> List[str]:
-    url = base.rstrip('/') + '/robots.txt'
+_CACHE: Dict[str, Tuple[float, Rules]] = {}
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=ROBOTS_TIMEOUT_SEC, follow_redirects=True)
+    return _client
+
+
+async def _fetch(base: str) -> Tuple[Rules, int]:
+    url = base.rstrip("/") + "/robots.txt"
     try:
-        r = httpx.get(url, timeout=8.0)
-        if r.status_code != 200 or 'Disallow' not in r.text:
-            return []
-        lines = []
-        active = False
-        for line in r.text.splitlines():
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            if line.lower().startswith('user-agent:'):
-                ua = line.split(':',1)[1].strip()
-                active = ua == '*'  # only track wildcard
-            elif active and line.lower().startswith('disallow:'):
-                path = line.split(':',1)[1].strip()
-                if path:
-                    lines.append(path)
-        return lines
-    except Exception:
-        return []
-
-
-def is_allowed(base: str, path: str) -> bool:
-    disallows = fetch_robots(base)
-    if not disallows:
-        return True
-    for rule in disallows:
-        # simple prefix match
-        if path.startswith(rule):
-            return False
-    return True
+        r = await _http().get(url)
+    except Exception as e:
+        log.warning("ROBOTS: fetch failed %s %s", url, e)
+        return ALLOW_ALL, ROBOTS_ERROR_TTL_SEC
+    if r.status_code >= 500:
+        return ALLOW_ALL, ROBOTS_ERROR_TTL_SEC
+    if r.status_code != 200:  # 4xx: no robots.txt, everything allowed
+        return ALLOW_ALL, ROBOTS_TTL_SEC
+    return parse(r.text), ROBOTS_TTL_SEC
+
+
+async def rules(base: str) -> Rules:
+    """Cached Rules for a site root; concurrent misses share one fetch."""
+    key = base.rstrip("/").lower()
+    hit = _CACHE.get(key)
+    if hit and hit[0] > time.time():
+        return hit[1]
+    with tracing.span("robots.fetch", site=key):
+        (parsed, ttl), _ = await singleflight.do("robots|" + key, lambda: _fetch(base))
+    _CACHE[key] = (time.time() + ttl, parsed)
+    return parsed
+
+
+async def is_allowed(base: str, path: str) -> bool:
+    return (await rules(base)).allowed(path or "/")
+
+
+async def crawl_delay(base: str) -> Optional[float]:
+    return (await rules(base)).crawl_delay
+
+
+async def close() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
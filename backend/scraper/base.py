@@ -1,19 +1,35 @@
 """
 Base scraper functionality for Orthodox book sites.
 Shared helpers for HTML fetching, parsing, retries, and user agent rotation.
+
+Fetching is HTTP-first: a pooled httpx client (keep-alive, HTTP/2 when `h2`
+is installed, gzip/brotli) with conditional requests backed by a local
+validator store; Playwright is only used when the static HTML lacks the
+selectors the caller expects. Rendered fetches lease warm pages from a
+small BrowserPool whose contexts carry a rotated user agent, instead of
+opening a fresh page per URL and attempt.
 """
 
 import asyncio
+import hashlib
+import importlib.util
+import json
+import os
 import random
 import re
 import logging
-from typing import Optional, Dict, Any, List
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Sequence
 from urllib.parse import urljoin, urlparse
 
-from playwright.async_api import async_playwright, Browser, Page, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 import httpx
 from bs4 import BeautifulSoup
 
+from ..browser_pool import BrowserPool, PoolTimeout
+from .. import hostrate, page_policy
+
 logger = logging.getLogger(__name__)
 
 # User agents for rotation
@@ -25,6 +41,54 @@ USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1.2 Safari/605.1.15"
 ]
 
+HTTP_TIMEOUT_SEC = 15.0
+SCRAPER_PAGE_POOL_SIZE = int(os.getenv("SCRAPER_PAGE_POOL_SIZE", "2"))
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled'
+]
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+VALIDATOR_DIR = os.getenv(
+    "HTTP_VALIDATOR_DIR", str(Path(__file__).resolve().parent.parent / "cache" / "http_validators")
+)
+
+class ValidatorStore:
+    """
+    ETag / Last-Modified validators plus the body they validate, one JSON
+    file per URL, so a 304 Not Modified can be answered from disk.
+    """
+    
+    def __init__(self, directory: str = VALIDATOR_DIR):
+        self.directory = Path(directory)
+    
+    def _path(self, url: str) -> Path:
+        return self.directory / (hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+    
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Stored validators for a URL.
+        
+        Returns:
+            Dict with etag, last_modified and body, or None
+        """
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str) -> None:
+        """Store validators and body (skipped when the server sent neither validator)."""
+        if not (etag or last_modified):
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self._path(url), "w", encoding="utf-8") as f:
+                json.dump({"etag": etag, "last_modified": last_modified, "body": body, "stored_at": time.time()}, f, ensure_ascii=False)
+        except OSError as e:
+            logger.debug(f"Could not store validators for {url}: {e}")
+
 def parse_number(text: str) -> Optional[float]:
     """
     Extract numbers from text like 'MB 8.5', '580 صفحة', '5.2 MB', etc.
@@ -115,43 +179,131 @@ class BaseScraper:
     Base scraper class with common functionality for Orthodox book sites.
     """
     
+    # CSS selectors proving a static listing / details page has parseable
+    # content; if none match, fetch_html falls back to a rendered page
+    listing_selectors: Sequence[str] = (
+        "article", "div[class*=book]", "div[class*=entry]", "div[class*=item]", "div[class*=post]",
+    )
+    details_selectors: Sequence[str] = (
+        "a[href*='.pdf']", "a[href*=download]", "iframe[src*='.pdf']",
+    )
+    
     def __init__(self, site_name: str, base_url: str):
         self.site_name = site_name
         self.base_url = base_url
-        self.browser: Optional[Browser] = None
-        self.playwright = None
+        # one long-lived context + page per worker, UA fixed at context creation
+        self.pages = BrowserPool(
+            headless=True,
+            size=SCRAPER_PAGE_POOL_SIZE,
+            context_options=lambda: {"user_agent": random.choice(USER_AGENTS)},
+            launch_args=CHROMIUM_ARGS,
+            context_setup=page_policy.install,
+        )
+        self.http: Optional[httpx.AsyncClient] = None
+        self.validators = ValidatorStore()
+    
+    def http_client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client (created on first use)"""
+        if self.http is None:
+            self.http = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                follow_redirects=True,
+                timeout=HTTP_TIMEOUT_SEC,
+                headers={"User-Agent": random.choice(USER_AGENTS), "Accept-Language": "ar,en;q=0.8"},
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+            )
+        return self.http
         
     async def initialize(self):
-        """Initialize Playwright browser"""
+        """Initialize Playwright browser (page pool)"""
         try:
-            self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-blink-features=AutomationControlled'
-                ]
-            )
+            await self.pages.start()
             logger.info(f"🌐 Initialized {self.site_name} scraper browser")
         except Exception as e:
             logger.error(f"❌ Failed to initialize {self.site_name} browser: {e}")
             raise
     
     async def cleanup(self):
-        """Cleanup browser resources"""
+        """Cleanup browser and HTTP client resources"""
         try:
-            if self.browser:
-                await self.browser.close()
-            if self.playwright:
-                await self.playwright.stop()
+            if self.http:
+                await self.http.aclose()
+                self.http = None
+            await self.pages.stop()
             logger.info(f"🧹 Cleaned up {self.site_name} scraper")
         except Exception as e:
             logger.error(f"❌ Error cleaning up {self.site_name}: {e}")
     
-    async def fetch_html(self, url: str, retries: int = 3) -> Optional[str]:
+    async def fetch_static(self, url: str) -> Optional[str]:
         """
-        Fetch HTML content with retries and error handling.
+        Fetch HTML over plain HTTP, revalidating with If-None-Match /
+        If-Modified-Since when validators are stored for the URL.
+        
+        Args:
+            url: URL to fetch
+            
+        Returns:
+            HTML content (from disk on 304) or None if failed
+        """
+        stored = self.validators.get(url)
+        headers = {}
+        if stored:
+            if stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
+        await hostrate.acquire(url)
+        try:
+            response = await self.http_client().get(url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.debug(f"HTTP fetch failed for {url}: {e}")
+            return None
+        if response.status_code == 304 and stored:
+            logger.debug(f"♻️ Not modified: {url}")
+            return stored.get("body")
+        if response.status_code != 200 or "html" not in response.headers.get("content-type", "html"):
+            return None
+        body = response.text
+        self.validators.put(url, response.headers.get("etag"), response.headers.get("last-modified"), body)
+        return body
+    
+    def has_selectors(self, html: str, selectors: Sequence[str]) -> bool:
+        """
+        Check whether static HTML contains any of the given selectors.
+        
+        Args:
+            html: HTML content
+            selectors: CSS selectors (empty = always satisfied)
+            
+        Returns:
+            True if any selector matches
+        """
+        if not selectors:
+            return True
+        soup = self.parse_html(html)
+        return any(soup.select_one(sel) for sel in selectors)
+    
+    async def fetch_html(self, url: str, retries: int = 3, expect: Optional[Sequence[str]] = None) -> Optional[str]:
+        """
+        Fetch HTML content, HTTP first and Playwright as fallback.
+        
+        Args:
+            url: URL to fetch
+            retries: Number of retry attempts for the rendered fallback
+            expect: Selectors the static HTML must contain to skip rendering
+            
+        Returns:
+            HTML content or None if failed
+        """
+        html = await self.fetch_static(url)
+        if html and self.has_selectors(html, expect or ()):
+            return html
+        logger.debug(f"🌐 Static HTML insufficient for {url}, rendering")
+        return await self.fetch_rendered(url, retries=retries)
+    
+    async def fetch_rendered(self, url: str, retries: int = 3) -> Optional[str]:
+        """
+        Fetch HTML content through Playwright with retries and error handling.
         
         Args:
             url: URL to fetch
@@ -162,40 +314,26 @@ class BaseScraper:
         """
         for attempt in range(retries):
             try:
-                if not self.browser:
-                    raise Exception("Browser not initialized")
-                
-                # Create new page with random user agent
-                page = await self.browser.new_page()
-                user_agent = random.choice(USER_AGENTS)
-                await page.set_user_agent(user_agent)
-                
-                # Add random delay to avoid detection
-                delay = random.randint(250, 800)
-                await asyncio.sleep(delay / 1000)
-                
-                # Navigate to page with timeout
-                logger.debug(f"🔄 Fetching {url} (attempt {attempt + 1}/{retries})")
-                await page.goto(url, wait_until="domcontentloaded", timeout=15000)
-                
-                # Wait for content to load
-                await page.wait_for_timeout(1000)
-                
-                # Get page content
-                content = await page.content()
-                await page.close()
+                async with self.pages.page() as page:
+                    # Navigate (page_policy.goto waits for the host's turn) to page with timeout
+                    logger.debug(f"🔄 Fetching {url} (attempt {attempt + 1}/{retries})")
+                    await page_policy.goto(page, url, timeout=15000)
+                    
+                    # Wait for content to load
+                    await page.wait_for_timeout(1000)
+                    
+                    # Get page content
+                    content = await page.content()
                 
                 logger.debug(f"✅ Successfully fetched {url}")
                 return content
                 
             except PlaywrightTimeoutError:
                 logger.warning(f"⏰ Timeout fetching {url} (attempt {attempt + 1}/{retries})")
-                if page:
-                    await page.close()
+            except PoolTimeout as e:
+                logger.warning(f"⏳ No free page for {url} (attempt {attempt + 1}/{retries}): {e}")
             except Exception as e:
                 logger.warning(f"❌ Error fetching {url} (attempt {attempt + 1}/{retries}): {e}")
-                if page:
-                    await page.close()
             
             # Exponential backoff
             if attempt < retries - 1:
@@ -41,7 +41,7 @@ class ChristianLibScraper(BaseScraper):
             # Try using the site's search functionality first
             search_url = f"https://www.christianlib.com/search/?q={query}"
             
-            html = await self.fetch_html(search_url)
+            html = await self.fetch_html(search_url, expect=self.listing_selectors)
             if html:
                 soup = self.parse_html(html)
                 books = await self._parse_search_results(soup, download=download)
@@ -148,7 +148,7 @@ class ChristianLibScraper(BaseScraper):
             logger.debug(f"📄 Fetching ChristianLib page {page_num} from {page_url}")
             
             # Fetch page HTML
-            html = await self.fetch_html(page_url)
+            html = await self.fetch_html(page_url, expect=self.listing_selectors)
             if not html:
                 logger.debug(f"⚠️ Could not fetch page {page_num}")
                 break
@@ -315,7 +315,7 @@ class ChristianLibScraper(BaseScraper):
             # If no direct PDF link and we have a details URL, fetch the details page
             if not download_url and details_url:
                 try:
-                    details_html = await self.fetch_html(details_url)
+                    details_html = await self.fetch_html(details_url, expect=self.details_selectors)
                     if details_html:
                         details_soup = self.parse_html(details_html)
                         pdf_links = self.find_pdf_links(details_soup, self.base_url)
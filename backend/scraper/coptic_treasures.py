@@ -5,9 +5,11 @@ Handles https://coptic-treasures.com/sections/books/
 
 import logging
 import re
-from typing import List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional
 from urllib.parse import urljoin
 
+from ..crawl_state import CrawlState
 from ..models import Book
 from .base import BaseScraper, detect_language, parse_number, normalize_url
 
@@ -18,11 +20,15 @@ class CopticTreasuresScraper(BaseScraper):
     Scraper for Coptic Treasures Orthodox books website.
     """
     
-    def __init__(self):
+    def __init__(self, state_path: Optional[str] = None):
         super().__init__(
             site_name="Coptic Treasures",
             base_url="https://coptic-treasures.com"
         )
+        # remembered details URLs for incremental fetch_all_books runs
+        self.state = CrawlState(
+            state_path or str(Path(__file__).resolve().parent.parent / "cache" / "crawl_coptic_treasures.json")
+        )
     
     async def search_books(self, query: str, download: bool = False) -> List[Book]:
         """
@@ -58,19 +64,30 @@ class CopticTreasuresScraper(BaseScraper):
             logger.error(f"❌ Error searching Coptic Treasures: {e}")
             return []
     
-    async def fetch_all_books(self, download: bool = False) -> List[Book]:
+    async def fetch_all_books(self, download: bool = False, incremental: bool = False) -> List[Book]:
         """
         Fetch all books from Coptic Treasures books section.
         
+        In incremental mode, details pages are only fetched for URLs not seen
+        before, and pagination stops at the first page whose items are all
+        known; the rest of the catalog comes from the remembered crawl state.
+        A full pass still runs whenever the state's re-verification is due.
+        
         Args:
             download: Whether to download PDF files
+            incremental: Stop at already-known listing pages
             
         Returns:
             List of all Book objects
         """
-        logger.info("📚 Fetching all books from Coptic Treasures")
+        full = not incremental or self.state.full_due()
+        logger.info(f"📚 Fetching all books from Coptic Treasures ({'full' if full else 'incremental'})")
         
         books = []
+        seen: Dict[str, dict] = {}
+        # "complete": reached the end of the listing, "capped": stopped at
+        # the page limit; anything else means the pass was cut short
+        outcome = "partial"
         page_num = 1
         
         try:
@@ -84,7 +101,7 @@ class CopticTreasuresScraper(BaseScraper):
                 logger.debug(f"📄 Fetching Coptic Treasures page {page_num}")
                 
                 # Fetch page HTML
-                html = await self.fetch_html(page_url)
+                html = await self.fetch_html(page_url, expect=self.listing_selectors)
                 if not html:
                     logger.warning(f"⚠️ Could not fetch page {page_num}")
                     break
@@ -108,7 +125,7 @@ class CopticTreasuresScraper(BaseScraper):
                 page_books = []
                 for entry in book_entries:
                     try:
-                        book = await self._parse_book_entry(entry, download=download)
+                        book = await self._parse_book_entry(entry, download=download, known=None if full else self.state)
                         if book:
                             page_books.append(book)
                     except Exception as e:
@@ -117,11 +134,20 @@ class CopticTreasuresScraper(BaseScraper):
                 
                 if not page_books:
                     logger.info(f"📄 No more books found on page {page_num}")
+                    if page_num > 1:  # followed a next link past the last page
+                        outcome = "complete"
                     break
                 
                 books.extend(page_books)
                 logger.info(f"✅ Found {len(page_books)} books on page {page_num}")
                 
+                page_known = self.state.all_known(b.details_url for b in page_books)
+                for b in page_books:
+                    seen[b.details_url] = b.dict()
+                if not full and page_known:
+                    logger.info(f"📄 Page {page_num} only has known books, stopping incremental crawl")
+                    break
+                
                 # Check for next page
                 next_link = (
                     soup.find('a', string=re.compile(r'next|التالي|→|>')) or
@@ -131,6 +157,7 @@ class CopticTreasuresScraper(BaseScraper):
                 
                 if not next_link:
                     logger.info("📄 No next page found, stopping pagination")
+                    outcome = "complete"
                     break
                 
                 page_num += 1
@@ -138,22 +165,52 @@ class CopticTreasuresScraper(BaseScraper):
                 # Safety limit
                 if page_num > 50:
                     logger.warning("🚫 Reached page limit (50), stopping")
+                    outcome = "capped"
                     break
             
             logger.info(f"✅ Total books fetched from Coptic Treasures: {len(books)}")
-            return books
             
         except Exception as e:
             logger.error(f"❌ Error fetching books from Coptic Treasures: {e}")
-            return books
+        
+        return self._merge_state(books, seen, outcome if full else "partial")
+    
+    def _merge_state(self, books: List[Book], seen: Dict[str, dict], outcome: str) -> List[Book]:
+        """
+        Record this run in the crawl state and return the full catalog.
+        
+        Args:
+            books: Books fetched in this run
+            seen: details_url -> book dict for this run
+            outcome: "complete" for a full pass that reached the end of the
+                listing (forgets unlisted URLs), "capped" for one stopped
+                at the page limit, "partial" otherwise
+            
+        Returns:
+            This run's books followed by remembered books not seen this run
+        """
+        if outcome == "complete":
+            self.state.replace_all(seen)
+        else:
+            for url, rec in seen.items():
+                self.state.remember(url, rec)
+            if outcome == "capped":
+                self.state.mark_full()
+        try:
+            self.state.save()
+        except OSError as e:
+            logger.warning(f"⚠️ Could not save crawl state: {e}")
+        remembered = [Book(**r) for url, r in self.state.items.items() if url not in seen]
+        return books + remembered
     
-    async def _parse_book_entry(self, entry, download: bool = False) -> Optional[Book]:
+    async def _parse_book_entry(self, entry, download: bool = False, known: Optional[CrawlState] = None) -> Optional[Book]:
         """
         Parse a single book entry from the HTML.
         
         Args:
             entry: BeautifulSoup element containing book info
             download: Whether to download PDF files
+            known: Crawl state; remembered details URLs skip the details fetch
             
         Returns:
             Book object or None if parsing fails
@@ -205,9 +262,12 @@ class CopticTreasuresScraper(BaseScraper):
             
             # Extract download URL by fetching details page if needed
             download_url = None
-            if details_url:
+            remembered = known.get(details_url) if known else None
+            if remembered:
+                download_url = remembered.get("download_url")
+            elif details_url:
                 try:
-                    details_html = await self.fetch_html(details_url)
+                    details_html = await self.fetch_html(details_url, expect=self.details_selectors)
                     if details_html:
                         details_soup = self.parse_html(details_html)
                         pdf_links = self.find_pdf_links(details_soup, self.base_url)
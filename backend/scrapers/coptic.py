@@ -1,119 +1,178 @@
 from __future__ import annotations
 """Coptic Treasures scraper (polite, no PDF storage)."""
-import random, re
-from typing import List, Dict, Any, Optional, Tuple
+import asyncio, os, re
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from playwright.async_api import Page
 from robots import is_allowed
+from textnorm import normalize
+from page_policy import goto
+from tracing import span
 from models_types import Book
+from .extract import extract_anchors, extract_cards
 
-NAV_DELAY_RANGE_MS = (400, 700)
-
-async def wait_rand(page):
-    from asyncio import sleep
-    await sleep(random.randint(*NAV_DELAY_RANGE_MS)/1000)
+# detail pages resolved in parallel (each worker owns one extra page);
+# navigations are spaced per host by hostrate via page_policy.goto
+DETAIL_CONCURRENCY = max(1, int(os.getenv("COPTIC_DETAIL_CONCURRENCY", "4")))
 
 BASE = "https://coptic-treasures.com"
 LIST_START = f"{BASE}/sections/books/"
 
+CARD_SELECTORS = [
+    'article',
+    'div.book, div.card, div.entry, div.post, div.grid-item',
+    'div[class*="book"], div[class*="entry"], div[class*="card"]',
+    'li[class*="book"], li[class*="entry"]'
+]
+
 async def _extract_page_cards(page: Page) -> List[Tuple[str,str,str]]:
-    selectors = [
-        'article',
-        'div.book, div.card, div.entry, div.post, div.grid-item',
-        'div[class*="book"], div[class*="entry"], div[class*="card"]',
-        'li[class*="book"], li[class*="entry"]'
-    ]
-    for sel in selectors:
-        els = await page.query_selector_all(sel)
-        if els:
-            out = []
-            for el in els:
-                a = await el.query_selector('a')
-                if not a: continue
-                title = (await a.inner_text() or '').strip()
-                href = await a.get_attribute('href') or ''
-                if not title or not href: continue
-                details = href if href.startswith('http') else BASE + href
-                img = await el.query_selector('img')
-                cover = ''
-                if img:
-                    src = await img.get_attribute('src')
-                    if src:
-                        cover = src if src.startswith('http') else BASE + src
-                out.append((title, details, cover))
-            if out:
-                return out
-    # fallback: anchors
-    links = await page.query_selector_all('a')
     out = []
-    for a in links:
-        t = (await a.inner_text() or '').strip()
-        h = await a.get_attribute('href') or ''
+    for title, href, src in await extract_cards(page, CARD_SELECTORS):
+        details = href if href.startswith('http') else BASE + href
+        cover = (src if src.startswith('http') else BASE + src) if src else ''
+        out.append((title, details, cover))
+    if out:
+        return out
+    # fallback: anchors
+    for t, h in await extract_anchors(page):
         if not t or not h: continue
         if '/book' in h or '/books/' in h:
             out.append((t, h if h.startswith('http') else BASE + h, ''))
     return out
 
-async def _get_pdf(page: Page, details_url: str) -> str:
+# One in-page pass per details page: returns a compact record instead of
+# shipping page.content() over CDP and regex-scanning it in Python.
+_DETAILS_JS = r"""
+() => {
+  const pick = (sel, attr) => {
+    const el = document.querySelector(sel);
+    return el ? (el.getAttribute(attr) || '') : '';
+  };
+  let pdf = pick('a[href$=".pdf"], a[href*=".pdf?"]', 'href');
+  if (!pdf) {
+    const btn = [...document.querySelectorAll('a, button')].find(el =>
+      (el.tagName === 'A' && /تحميل|Download/.test(el.textContent || '')) ||
+      (el.tagName === 'BUTTON' && (el.textContent || '').includes('تحميل')));
+    if (btn) pdf = btn.getAttribute('href') || '';
+  }
+  if (!pdf) pdf = pick('iframe[src$=".pdf"], iframe[src*="/pdf"]', 'src');
+  const root = document.querySelector('article, .entry-content, .post, .content') || document.body;
+  const text = (root ? root.innerText : '')
+    .replace(/[\u0660-\u0669]/g, d => String(d.charCodeAt(0) - 0x0660));
+  const num = re => { const m = text.match(re); return m ? m[1] : null; };
+  const cat = document.querySelector('a[rel~="category"], .cat-links a, .posted-in a');
+  return {
+    pdf,
+    year: num(/\b(18\d{2}|19\d{2}|20\d{2})\b/),
+    pages: num(/(\d+)\s*(?:صفحة|pages?)/i),
+    size_mb: num(/(\d+(?:\.\d+)?)\s*(?:MB|ميجا)/i),
+    category: cat ? cat.textContent.trim() : '',
+  };
+}
+"""
+
+def _num(v, cast):
+    try:
+        return cast(v) if v else None
+    except (TypeError, ValueError):
+        return None
+
+async def _get_details(page: Page, details_url: str) -> Dict[str, Any]:
+    """Navigate to a details page and extract pdf/year/pages/size/category."""
+    rec: Dict[str, Any] = {'pdf': '', 'year': None, 'pages': None, 'size_mb': None, 'category': None}
     try:
-        if not is_allowed(BASE, details_url.replace(BASE,'')):
-            return ''
-        await page.goto(details_url)
-        await wait_rand(page)
-        for sel in ['a[href$=".pdf"]','a[href*=".pdf?" ]']:
-            a = await page.query_selector(sel)
-            if a:
-                href = await a.get_attribute('href')
-                if href:
-                    return href if href.startswith('http') else BASE + href
-        btn = await page.query_selector("a:has-text('تحميل'), a:has-text('Download'), button:has-text('تحميل')")
-        if btn:
-            href = await btn.get_attribute('href')
-            if href:
-                return href if href.startswith('http') else BASE + href
-        ifr = await page.query_selector('iframe[src$=".pdf"], iframe[src*="/pdf"]')
-        if ifr:
-            src = await ifr.get_attribute('src')
-            if src:
-                return src if src.startswith('http') else BASE + src
+        if not await is_allowed(BASE, details_url.replace(BASE,'')):
+            return rec
+        await goto(page, details_url, stage='detail')
+        raw = await page.evaluate(_DETAILS_JS)
     except Exception:
-        return ''
-    return ''
+        return rec
+    pdf = (raw.get('pdf') or '').strip()
+    if pdf:
+        rec['pdf'] = pdf if pdf.startswith('http') else BASE + pdf
+    rec['year'] = _num(raw.get('year'), int)
+    rec['pages'] = _num(raw.get('pages'), int)
+    rec['size_mb'] = _num(raw.get('size_mb'), float)
+    rec['category'] = raw.get('category') or None
+    return rec
 
-async def scrape(page: Page, q: Optional[str], max_pages: int, tried: List[str]) -> List[Dict[str,Any]]:
+async def _resolve_details(page: Page, urls: List[str],
+                           on_done: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """Resolve a details record for each URL through a bounded pool of worker
+    pages, leaving the listing page untouched. Order is preserved;
+    `on_done(i, rec)` (if given) fires as soon as URL i is resolved."""
+    out: List[Dict[str, Any]] = [{} for _ in urls]
+    queue: asyncio.Queue = asyncio.Queue()
+    for i, u in enumerate(urls):
+        queue.put_nowait((i, u))
+
+    async def worker():
+        wpage = await page.context.new_page()
+        try:
+            while True:
+                try:
+                    i, url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                out[i] = await _get_details(wpage, url)
+                if on_done:
+                    on_done(i, out[i])
+        finally:
+            await wpage.close()
+
+    if urls:
+        await asyncio.gather(*(worker() for _ in range(min(DETAIL_CONCURRENCY, len(urls)))))
+    return out
+
+def _record(card: Tuple[str,str,str], det: Dict[str, Any]) -> Dict[str, Any]:
+    title, details_url, cover = card
+    return Book(
+        title=title,
+        author='',
+        source='coptic',
+        details_url=details_url,
+        download_url=det.get('pdf', ''),
+        cover_image=cover,
+        pages=det.get('pages'),
+        size_mb=det.get('size_mb'),
+        year=det.get('year'),
+        category=det.get('category'),
+        lang='ar' if re.search(r'[\u0600-\u06FF]', title) else 'en',
+    ).dict()
+
+async def scrape(page: Page, q: Optional[str], max_pages: int, tried: List[str],
+                 on_item: Optional[Callable[[Dict[str,Any]], None]] = None) -> List[Dict[str,Any]]:
+    """Listing crawl; `on_item` (if given) receives each record as soon as its
+    details page is resolved. A query-less crawl that reaches the
+    last listing page (not max_pages) records 'complete:coptic' in `tried`."""
     results: List[Dict[str,Any]] = []
     next_url = LIST_START
     pages = 0
-    ql = (q or '').lower()
+    ql = normalize(q or '')
+    if q and not ql:
+        # e.g. diacritics only: matches nothing (an empty key would match every card)
+        tried.append('empty_query')
+        return results
     while next_url and pages < max_pages:
-        if not is_allowed(BASE, '/sections/books/'):
+        if not await is_allowed(BASE, '/sections/books/'):
             break
-        await page.goto(next_url)
-        await wait_rand(page)
+        with span('coptic.listing', page=pages + 1) as sp:
+            await goto(page, next_url, stage='listing')
+            cards = await _extract_page_cards(page)
+            if sp:
+                sp.set(cards=len(cards))
         pages += 1
-        cards = await _extract_page_cards(page)
         if ql:
-            cards = [c for c in cards if ql in c[0].lower()]
-        for title, details, cover in cards:
-            pdf = await _get_pdf(page, details)
-            body_html = await page.content()
-            pages_n = None
-            size_mb = None
-            year = None
-            cat = None
-            m = re.search(r'(18\d{2}|19\d{2}|20\d{2})', body_html)
-            if m:
-                try: year = int(m.group(1))
-                except: pass
-            results.append(Book(
-                title=title,
-                author='',
-                source='coptic',
-                details_url=details,
-                download_url=pdf,
-                cover_image=cover,
-                lang='ar' if re.search(r'[\u0600-\u06FF]', title) else 'en',
-                year=year,
-            ).dict())
+            cards = [c for c in cards if ql in normalize(c[0])]
+        records: List[Dict[str,Any]] = [{} for _ in cards]
+
+        def done(i: int, det: Dict[str, Any]) -> None:
+            records[i] = _record(cards[i], det)
+            if on_item:
+                on_item(records[i])  # completion order; `results` keeps listing order
+
+        with span('coptic.details', count=len(cards)):
+            await _resolve_details(page, [c[1] for c in cards], done)
+        results.extend(records)
         if q:
             break
         nxt = await page.query_selector('a[rel="next"], a:has-text("التالي"), a:has-text("Next")')
@@ -125,4 +184,7 @@ async def scrape(page: Page, q: Optional[str], max_pages: int, tried: List[str])
                 next_url = None
         else:
             next_url = None
+    if not q and not next_url:
+        # walked the whole listing: the catalog may answer for this source
+        tried.append('complete:coptic')
     return results
@@ -0,0 +1,60 @@
+from __future__ import annotations
+"""Batched DOM extraction helpers shared by the scrapers.
+
+Each helper is ONE page.evaluate round-trip, instead of query_selector_all
+followed by an inner_text/get_attribute call per element over the Playwright
+protocol. URLs are returned raw (as in the href/src attribute); callers keep
+their own absolute-URL rules.
+"""
+from typing import List, Sequence, Tuple
+from playwright.async_api import Page
+
+_CARDS_JS = r"""
+([selectors, linkSel, imgSel]) => {
+  for (const sel of selectors) {
+    const out = [];
+    for (const el of document.querySelectorAll(sel)) {
+      const a = el.querySelector(linkSel);
+      if (!a) continue;
+      const title = (a.innerText || '').trim();
+      const href = a.getAttribute('href') || '';
+      if (!title || !href) continue;
+      const img = imgSel ? el.querySelector(imgSel) : null;
+      out.push([title, href, img ? (img.getAttribute('src') || '') : '']);
+    }
+    if (out.length) return out;
+  }
+  return [];
+}
+"""
+
+_ANCHORS_JS = r"""
+(sel) => [...document.querySelectorAll(sel)].map(a => [(a.innerText || '').trim(), a.getAttribute('href') || ''])
+"""
+
+_ATTRS_JS = r"""
+([sel, attr]) => [...document.querySelectorAll(sel)].map(el => el.getAttribute(attr) || '').filter(Boolean)
+"""
+
+
+async def extract_cards(
+    page: Page, selectors: Sequence[str], link: str = 'a', img: str = 'img'
+) -> List[Tuple[str, str, str]]:
+    """(title, href, img_src) for the first selector group yielding any card.
+
+    A card needs a `link` descendant with both text and href; img_src is ''
+    when the card has no `img` descendant.
+    """
+    rows = await page.evaluate(_CARDS_JS, [list(selectors), link, img])
+    return [(t, h, s) for t, h, s in rows]
+
+
+async def extract_anchors(page: Page, selector: str = 'a') -> List[Tuple[str, str]]:
+    """(inner_text, href) for every element matching `selector`, in DOM order."""
+    rows = await page.evaluate(_ANCHORS_JS, selector)
+    return [(t, h) for t, h in rows]
+
+
+async def extract_attrs(page: Page, selector: str, attr: str) -> List[str]:
+    """Non-empty `attr` values for every element matching `selector`."""
+    return list(await page.evaluate(_ATTRS_JS, [selector, attr]))
@@ -0,0 +1,37 @@
+"""Single-flight coalescing of identical in-flight work (process local).
+
+Key design:
+ - Concurrent callers with the same key await ONE task and share its result
+ - The task is shielded: a disconnecting caller does not cancel the work the
+   others (and the cache) are waiting on
+ - Entries are dropped as soon as the task finishes; caching is daycache's job
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+_INFLIGHT: Dict[str, "asyncio.Task[Any]"] = {}
+
+
+def _done(key: str, task: "asyncio.Task[Any]") -> None:
+    if _INFLIGHT.get(key) is task:
+        _INFLIGHT.pop(key, None)
+    if not task.cancelled():
+        task.exception()  # mark retrieved even if every waiter went away
+
+
+async def do(key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+    """Run `fn` once per key. Returns (result, shared) where shared is True
+    for callers that joined an already running call."""
+    task = _INFLIGHT.get(key)
+    shared = task is not None
+    if task is None:
+        task = asyncio.ensure_future(fn())
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda t: _done(key, t))
+    return await asyncio.shield(task), shared
+
+
+def inflight() -> int:
+    return len(_INFLIGHT)
@@ -23,10 +23,10 @@ async def test_health():
     from fastapi.testclient import TestClient
     client = TestClient(app)
     
-    response = client.get("/healthz")
+    response = client.get("/health")
     assert response.status_code == 200
     data = response.json()
-    assert data["status"] == "ok"
+    assert data["ok"] is True
     print("✅ Health check passed")
 
 async def test_library_all():
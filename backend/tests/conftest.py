@@ -0,0 +1,23 @@
+"""Backend modules are flat (imported as `daycache`, `robots`, ...), as in main.py."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class Clock:
+    """Settable stand-in for time.time / time.monotonic."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """A Clock; test modules override this fixture to patch it into their module."""
+    return Clock()
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+import admission
+from admission import Overloaded
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_MAX_ACTIVE", 1)
+    monkeypatch.setattr(admission, "ADMISSION_MAX_QUEUE", 1)
+    monkeypatch.setattr(admission, "ADMISSION_QUEUE_TIMEOUT_SEC", 0.05)
+    monkeypatch.setattr(admission, "_sem", None)  # bound to the test's event loop
+    monkeypatch.setattr(admission, "_state", {"active": 0, "waiting": 0})
+    monkeypatch.setattr(admission, "_STATS", {**admission._STATS, "admitted": 0, "waited": 0, "avg_run_sec": 20.0})
+
+
+async def hold(release: asyncio.Event, log=None, name=None):
+    async with admission.slot():
+        if log is not None:
+            log.append(name)
+        await release.wait()
+
+
+def test_slot_is_released_after_the_block():
+    async def main():
+        async with admission.slot():
+            assert admission.stats()["active"] == 1
+        with pytest.raises(RuntimeError):
+            async with admission.slot():
+                raise RuntimeError("crawl failed")
+        return admission.stats()
+
+    stats = asyncio.run(main())
+    assert stats["active"] == 0 and stats["admitted"] == 2
+
+
+def test_waiter_is_admitted_when_a_slot_frees(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_QUEUE_TIMEOUT_SEC", 5)
+
+    async def main():
+        release, log = asyncio.Event(), []
+        first = asyncio.ensure_future(hold(release, log, "first"))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(hold(release, log, "second"))
+        await asyncio.sleep(0.01)
+        assert admission.stats()["waiting"] == 1
+        release.set()
+        await asyncio.gather(first, second)
+        return log
+
+    assert asyncio.run(main()) == ["first", "second"]
+    assert admission.stats()["waiting"] == 0
+    assert admission._STATS["waited"] == 1
+
+
+def test_queue_timeout_raises_overloaded():
+    async def main():
+        release = asyncio.Event()
+        busy = asyncio.ensure_future(hold(release))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(Overloaded) as exc:
+                async with admission.slot():
+                    pass
+            return exc.value
+        finally:
+            release.set()
+            await busy
+
+    err = asyncio.run(main())
+    assert err.reason == "timeout"
+    assert err.retry_after >= 1.0
+    assert admission.stats()["rejected_timeout"] >= 1
+
+
+def test_full_queue_rejects_at_once(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_QUEUE_TIMEOUT_SEC", 5)
+
+    async def main():
+        release = asyncio.Event()
+        busy = asyncio.ensure_future(hold(release))
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(hold(release))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(Overloaded) as exc:
+                async with admission.slot():
+                    pass
+            return exc.value
+        finally:
+            release.set()
+            await asyncio.gather(busy, queued)
+
+    err = asyncio.run(main())
+    assert err.reason == "queue_full"
+    # one running plus one waiting: two rounds of the average crawl
+    assert err.retry_after == pytest.approx(40.0)
+
+
+def test_retry_after_scales_with_backlog(monkeypatch):
+    monkeypatch.setattr(admission, "_state", {"active": 1, "waiting": 2})
+    assert admission.retry_after() == pytest.approx(3 * 20.0)
+    monkeypatch.setitem(admission._STATS, "avg_run_sec", 0.1)
+    assert admission.retry_after() == 1.0  # never below one second
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+import catalog
+
+
+def book(title, source="coptic", url=None, author=""):
+    return {"title": title, "author": author, "source": source, "details_url": url or f"https://{source}/{title}"}
+
+
+@pytest.fixture(autouse=True)
+def empty_catalog(monkeypatch):
+    monkeypatch.setattr(catalog, "_DOCS", {})
+    monkeypatch.setattr(catalog, "_INDEX", {})
+    monkeypatch.setattr(catalog, "_VOCAB", [])
+    monkeypatch.setattr(catalog, "_TOKENS", {})
+    monkeypatch.setattr(catalog, "_SEQ", {})
+    monkeypatch.setattr(catalog, "_next_seq", 0)
+    monkeypatch.setattr(catalog, "_STATE", {"built_at": 0.0, "dirty": False, "complete": {}})
+
+
+def titles(items):
+    return [it["title"] for it in items]
+
+
+def test_complete_sources_from_tried():
+    assert catalog.complete_sources(["list_cards", "complete:coptic", "timeout:christianlib"]) == {"coptic"}
+
+
+def test_prefix_match_on_every_query_token():
+    catalog.replace([book("Life of Saint Antony"), book("Saint Mark", author="Severus")], {"coptic", "christianlib"})
+    assert titles(catalog.search("sain ant")) == ["Life of Saint Antony"]
+    assert titles(catalog.search("sev")) == ["Saint Mark"]  # author tokens are indexed too
+    assert catalog.search("antony mark") == []
+    assert catalog.search("") == []
+
+
+def test_arabic_forms_are_folded():
+    catalog.replace([book("تفسير إنجيل متى")], {"coptic", "christianlib"})
+    assert titles(catalog.search("انجيل")) == ["تفسير إنجيل متى"]
+    assert titles(catalog.search("مَتَى")) == ["تفسير إنجيل متى"]
+
+
+def test_only_answers_for_complete_sources():
+    catalog.replace([book("Athanasius"), book("Athanasius", source="christianlib")], {"coptic"})
+    assert titles(catalog.search("athanasius", "coptic")) == ["Athanasius"]
+    assert catalog.search("athanasius", "christianlib") == []
+    assert catalog.search("athanasius") == []  # "all" needs every source
+
+
+def test_live_results_never_add_a_source():
+    catalog.add([book("Athanasius on the Incarnation", source="christianlib")])
+    assert catalog.stats()["docs"] == 0
+    catalog.replace([book("Cyril")], {"coptic"})
+    catalog.add([book("Athanasius", url="https://coptic/new"), book("Basil", source="christianlib")])
+    assert catalog.stats()["docs"] == 2
+    assert titles(catalog.search("athanasius", "coptic")) == ["Athanasius"]
+
+
+def test_replace_swaps_complete_sources_and_keeps_the_rest():
+    catalog._STATE["complete"]["christianlib"] = 1.0
+    catalog.replace([book("Old"), book("Kept", source="christianlib")], {"coptic", "christianlib"})
+    catalog.replace([book("New"), book("Dropped", source="christianlib")], {"coptic"})
+    assert sorted(titles(catalog._DOCS.values())) == ["Kept", "New"]
+    assert catalog._VOCAB == ["kept", "new"]  # tokens of removed docs are unindexed
+    assert titles(catalog.search("kept")) == ["Kept"]
+
+
+def test_ranking_prefers_whole_title_tokens_then_shorter_titles():
+    catalog.replace(
+        [
+            book("Athanasiana"),
+            book("Letters", author="Athanasius"),
+            book("Life of Athanasius"),
+            book("Athanasius"),
+        ],
+        {"coptic", "christianlib"},
+    )
+    assert titles(catalog.search("athanasius")) == ["Athanasius", "Life of Athanasius", "Letters"]
+    # no whole-token match: shorter titles, then catalog order
+    assert titles(catalog.search("athanas")) == ["Athanasiana", "Letters", "Athanasius", "Life of Athanasius"]
+
+
+def test_search_respects_limit():
+    catalog.replace([book(f"Psalms {i}") for i in range(5)], {"coptic", "christianlib"})
+    assert titles(catalog.search("psalms", limit=2)) == ["Psalms 0", "Psalms 1"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "catalog.json")
+    catalog.replace([book("Antony")], {"coptic"})
+    catalog.save(path)
+    built_at = catalog._STATE["built_at"]
+    catalog._DOCS.clear()
+    catalog._reindex()
+    assert catalog.load(path) == 1
+    assert catalog._STATE["built_at"] == built_at
+    assert titles(catalog.search("antony", "coptic")) == ["Antony"]
+
+
+def test_file_without_completion_data_is_crawled_again(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps({"built_at": 123.0, "items": [book("Antony")]}), encoding="utf-8")
+    assert catalog.load(str(path)) == 1
+    assert catalog._STATE["built_at"] == 0.0
+    assert catalog.search("antony", "coptic") == []
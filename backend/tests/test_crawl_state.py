@@ -0,0 +1,68 @@
+import pytest
+
+import crawl_state
+from crawl_state import CrawlState
+
+
+@pytest.fixture
+def clock(clock, monkeypatch):
+    monkeypatch.setattr(crawl_state.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def state(clock, tmp_path):
+    st = CrawlState(str(tmp_path / "state.json"), full_verify_sec=100)
+    st.replace_all({"a": {"title": "A"}, "b": {"title": "B"}})
+    return st
+
+
+def test_new_state_is_due_for_a_full_pass(clock, tmp_path):
+    st = CrawlState(str(tmp_path / "missing.json"), full_verify_sec=100)
+    assert st.full_due()
+    assert st.items == {}
+
+
+def test_complete_pass_drops_unlisted_urls(clock, state):
+    clock.now += 150
+    assert state.full_due()
+    state.replace_all({"b": {"title": "B2"}, "c": {"title": "C"}})
+    assert state.items == {"b": {"title": "B2"}, "c": {"title": "C"}}
+    assert not state.full_due()
+
+
+def test_capped_pass_verifies_but_keeps_urls_beyond_the_cap(clock, state):
+    clock.now += 150
+    state.remember("c", {"title": "C"})
+    state.mark_full()
+    assert set(state.items) == {"a", "b", "c"}
+    assert not state.full_due()
+
+
+def test_partial_pass_changes_neither(clock, state):
+    clock.now += 150
+    state.remember("c", {"title": "C"})
+    assert set(state.items) == {"a", "b", "c"}
+    assert state.full_due()
+
+
+def test_all_known_needs_at_least_one_url(state):
+    assert state.all_known(["a", None, "b"])
+    assert not state.all_known(["a", "z"])
+    assert not state.all_known([None, ""])
+    assert state.known("a") and not state.known(None)
+
+
+def test_save_and_load_round_trip(clock, state):
+    state.save()
+    again = CrawlState(state.path, full_verify_sec=100)
+    assert again.items == state.items
+    assert again.last_full == clock.now
+    assert again.records(lambda r: r["title"] == "B") == [{"title": "B"}]
+
+
+def test_corrupt_file_starts_empty(clock, tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("{not json", encoding="utf-8")
+    st = CrawlState(str(path))
+    assert st.items == {} and st.last_full == 0.0
@@ -0,0 +1,146 @@
+import pytest
+
+import daycache
+from daycache import MemoryBackend, SqliteBackend
+
+BOOKS = [{"title": "Book", "url": "https://example.org/b"}]
+
+
+@pytest.fixture
+def clock(clock, monkeypatch):
+    monkeypatch.setattr(daycache.time, "time", clock)
+    monkeypatch.setattr(daycache, "DAILY_TTL", 1000)
+    monkeypatch.setattr(daycache, "SOFT_TTL", 100)
+    monkeypatch.setattr(daycache, "GRACE_TTL", 500)
+    monkeypatch.setattr(daycache, "NEGATIVE_TTL", 50)
+    monkeypatch.setattr(daycache, "ATIME_RESOLUTION_SEC", 10)
+    return clock
+
+
+def _make(kind, tmp_path, **bounds):
+    if kind == "memory":
+        return MemoryBackend(**bounds)
+    return SqliteBackend(str(tmp_path / "daycache.sqlite3"), **bounds)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    b = _make(request.param, tmp_path)
+    monkeypatch.setattr(daycache, "_backend", b)
+    return b
+
+
+def test_fresh_then_soft_then_hard_expiry(clock, backend):
+    daycache.set("k", BOOKS)
+    assert daycache.lookup("k") == (BOOKS, False)
+
+    clock.now += 101
+    assert daycache.lookup("k") == (BOOKS, True)  # stale-while-revalidate
+
+    clock.now += 900
+    assert daycache.lookup("k") is None
+    assert backend.get("k") is not None  # kept for the grace window
+
+
+def test_grace_window_serves_expired_data(clock, backend):
+    daycache.set("k", BOOKS)
+    clock.now += 1400
+    assert daycache.get("k") is None
+    assert daycache.get_expired("k") == BOOKS
+
+    clock.now += 101  # past DAILY_TTL + GRACE_TTL
+    assert daycache.get_expired("k") is None
+    assert daycache.lookup("k") is None
+    assert backend.get("k") is None
+
+
+def test_empty_results_are_not_cached(clock, backend):
+    daycache.set("k", [])
+    assert backend.usage()[0] == 0
+    assert daycache.get("k") is None
+
+
+def test_negative_cache_expires(clock, backend):
+    daycache.set_negative("k", ["sel_a", "sel_b"])
+    assert daycache.get_negative("k") == ["sel_a", "sel_b"]
+    assert daycache.get("k") is None  # separate key space
+
+    clock.now += 51
+    assert daycache.get_negative("k") is None
+    assert backend.get("neg|k") is None
+
+
+def test_purge_drops_only_expired(clock, backend):
+    daycache.set_negative("old", ["x"])
+    daycache.set("old", BOOKS)
+    clock.now += 60
+    daycache.set("new", BOOKS)
+    assert daycache.purge() == 1  # the negative entry
+    clock.now += 1450  # "old" past grace, "new" still within it
+    assert daycache.purge() == 1
+    assert backend.get("old") is None
+    assert backend.get("new") is not None
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_entry_bound_evicts_least_recently_used(clock, tmp_path, kind):
+    b = _make(kind, tmp_path, max_entries=2)
+    b.set("a", clock.now, BOOKS)
+    clock.now += 20
+    b.set("b", clock.now, BOOKS)
+    clock.now += 20
+    assert b.get("a") is not None  # "a" is now more recent than "b"
+    b.set("c", clock.now, BOOKS)
+    assert b.get("b") is None
+    assert b.get("a") is not None and b.get("c") is not None
+    assert b.usage()[0] == 2
+    assert b.evictions == 1
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_byte_bound_evicts_oldest(clock, tmp_path, kind):
+    size = daycache._size(BOOKS)
+    b = _make(kind, tmp_path, max_bytes=2 * size + size // 2)
+    for key in "abc":
+        clock.now += 20
+        b.set(key, clock.now, BOOKS)
+    assert b.get("a") is None
+    assert b.usage() == (2, 2 * size)
+    assert b.evictions == 1
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_byte_bound_keeps_single_oversized_entry(clock, tmp_path, kind):
+    b = _make(kind, tmp_path, max_bytes=1)
+    b.set("a", clock.now, BOOKS)
+    assert b.get("a") is not None
+    b.set("b", clock.now, BOOKS)
+    assert b.get("a") is None and b.get("b") is not None
+
+
+def test_sqlite_hits_batch_atime_writes(clock, tmp_path):
+    b = _make("sqlite", tmp_path)
+    b.set("a", clock.now, BOOKS)
+    atime = lambda: b._db.execute("SELECT atime FROM entries WHERE key = 'a'").fetchone()[0]
+
+    clock.now += 5  # within ATIME_RESOLUTION_SEC: nothing to write
+    b.get("a")
+    assert b._touched == {}
+
+    clock.now += 10
+    b.get("a")
+    assert b._touched == {"a": clock.now}
+    assert atime() == clock.now - 15  # not written on the read path
+
+    b.set("b", clock.now, BOOKS)
+    assert b._touched == {}
+    assert atime() == clock.now
+
+
+def test_sqlite_entries_are_shared_between_connections(clock, tmp_path):
+    first = _make("sqlite", tmp_path)
+    second = _make("sqlite", tmp_path)
+    first.set("k", clock.now, BOOKS)
+    assert second.get("k") == (clock.now, BOOKS)
+    second.delete("k")
+    assert first.get("k") is None
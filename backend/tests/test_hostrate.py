@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+import hostrate
+from hostrate import Bucket
+
+
+@pytest.fixture
+def clock(clock, monkeypatch):
+    monkeypatch.setattr(hostrate.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def slept(clock, monkeypatch):
+    """Record sleeps instead of taking them (and move the clock on)."""
+    out = []
+
+    async def sleep(sec):
+        out.append(sec)
+        clock.now += sec
+
+    monkeypatch.setattr(hostrate.asyncio, "sleep", sleep)
+    monkeypatch.setattr(hostrate, "_BUCKETS", {})
+    monkeypatch.setattr(hostrate, "_delay_source", None)
+    monkeypatch.setattr(hostrate, "MIN_INTERVAL_SEC", 0.5)
+    monkeypatch.setattr(hostrate, "BURST", 2)
+    monkeypatch.setattr(hostrate, "MAX_CRAWL_DELAY_SEC", 30)
+    return out
+
+
+def acquire_all(*urls):
+    async def main():
+        return [await hostrate.acquire(u) for u in urls]
+
+    return asyncio.run(main())
+
+
+def test_burst_then_one_per_interval(clock):
+    b = Bucket(interval=1.0, burst=3)
+    assert [b.reserve() for _ in range(5)] == [0.0, 0.0, 0.0, 1.0, 2.0]  # concurrent callers are spaced out
+    assert b.acquired == 5 and b.waited == 3.0
+
+
+def test_idle_time_refills_up_to_burst(clock):
+    b = Bucket(interval=1.0, burst=2)
+    b.reserve()
+    b.reserve()
+    clock.now += 1.0
+    assert b.reserve() == 0.0
+    assert b.reserve() == pytest.approx(1.0)
+    clock.now += 100
+    assert [b.reserve() for _ in range(3)] == [0.0, 0.0, 1.0]  # no more than `burst` saved up
+
+
+def test_zero_interval_never_waits(clock):
+    b = Bucket(interval=0.0, burst=1)
+    assert [b.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_hosts_are_independent(slept):
+    waits = acquire_all("https://a.example/1", "https://a.example/2", "https://b.example/1", "https://a.example/3")
+    assert waits == [0.0, 0.0, 0.0, 0.5]
+    assert slept == [0.5]
+    assert set(hostrate.stats()) == {"a.example", "b.example"}
+
+
+def test_url_without_host_is_not_limited(slept):
+    assert acquire_all("about:blank", "about:blank", "about:blank") == [0.0, 0.0, 0.0]
+    assert hostrate.stats() == {}
+
+
+def test_crawl_delay_sets_interval_and_burst_one(slept):
+    async def delay(root):
+        return {"https://slow.example": 5.0, "https://huge.example": 3600.0}.get(root)
+
+    hostrate.set_delay_source(delay)
+    assert acquire_all("https://slow.example/a", "https://slow.example/b") == [0.0, 5.0]
+    assert acquire_all("https://huge.example/a", "https://huge.example/b") == [0.0, 30.0]  # capped
+    assert hostrate.stats()["slow.example"]["burst"] == 1
+
+
+def test_failing_delay_source_falls_back_to_min_interval(slept):
+    async def delay(root):
+        raise RuntimeError("robots fetch failed")
+
+    hostrate.set_delay_source(delay)
+    assert acquire_all(*["https://a.example/x"] * 3) == [0.0, 0.0, 0.5]
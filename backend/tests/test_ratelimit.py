@@ -0,0 +1,100 @@
+import pytest
+
+import ratelimit
+from ratelimit import MemoryStore, RateLimited, SqliteStore
+
+
+@pytest.fixture
+def clock(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit.time, "time", clock)
+    monkeypatch.setattr(ratelimit, "_last_sweep", clock.now)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_WINDOW", 60)
+    monkeypatch.setitem(ratelimit.BUDGETS, "miss", 3)  # one request per 20 s
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    s = MemoryStore() if request.param == "memory" else SqliteStore(str(tmp_path / "rl.sqlite3"))
+    monkeypatch.setattr(ratelimit, "_store", s)
+    return s
+
+
+def test_burst_then_reject_then_retry_after(clock, store):
+    for _ in range(3):
+        ratelimit.check("miss", "1.2.3.4")
+    with pytest.raises(RateLimited) as exc:
+        ratelimit.check("miss", "1.2.3.4")
+    assert exc.value.budget == "miss"
+    assert exc.value.retry_after == pytest.approx(20.0)
+
+    clock.now += 19.9
+    with pytest.raises(RateLimited):
+        ratelimit.check("miss", "1.2.3.4")
+    clock.now += 0.1
+    ratelimit.check("miss", "1.2.3.4")  # exactly one emission interval later
+
+
+def test_rejected_requests_do_not_push_the_schedule(clock, store):
+    for _ in range(3):
+        ratelimit.check("miss", "c")
+    for _ in range(5):
+        with pytest.raises(RateLimited):
+            ratelimit.check("miss", "c")
+    clock.now += 20
+    ratelimit.check("miss", "c")
+
+
+def test_clients_and_budgets_are_independent(clock, store):
+    for _ in range(3):
+        ratelimit.check("miss", "a")
+    ratelimit.check("miss", "b")
+    ratelimit.check("hit", "a")
+
+
+def test_no_client_is_not_charged(clock, store):
+    for _ in range(10):
+        ratelimit.check("miss")
+    assert store.size() == 0
+
+
+def test_idle_keys_are_fully_replenished_and_swept(clock, store):
+    for _ in range(3):
+        ratelimit.check("miss", "a")
+    clock.now += 60
+    assert store.sweep(clock.now) == 1
+    for _ in range(3):
+        ratelimit.check("miss", "a")
+
+
+def test_memory_store_is_bounded(clock):
+    s = MemoryStore(max_keys=2)
+    for key in ("a", "b", "c"):
+        assert s.update(key, clock.now, 1.0, 60) == (True, 0.0)
+    assert s.size() == 2
+    assert list(s._tat) == ["b", "c"]  # oldest-updated key evicted first
+
+
+def test_sqlite_workers_share_budget_after_sync(clock, tmp_path):
+    path = str(tmp_path / "rl.sqlite3")
+    a, b = SqliteStore(path), SqliteStore(path)
+    for _ in range(3):
+        assert a.update("k", clock.now, 20.0, 60)[0]
+    assert b.update("k", clock.now, 20.0, 60)[0]  # b has not seen a's charges yet
+    a.sync(clock.now)
+    b.sync(clock.now)
+    ok, retry_after = b.update("k", clock.now, 20.0, 60)
+    assert not ok
+    assert retry_after == pytest.approx(40.0)  # four charges merged: TAT = now + 80
+    a.sync(clock.now)
+    assert not a.update("k", clock.now, 20.0, 60)[0]
+
+
+def test_sqlite_sync_drops_expired_rows(clock, tmp_path):
+    s = SqliteStore(str(tmp_path / "rl.sqlite3"))
+    s.update("k", clock.now, 20.0, 60)
+    s.sync(clock.now)
+    assert s._db.execute("SELECT COUNT(*) FROM tat").fetchone()[0] == 1
+    clock.now += 21
+    s.sync(clock.now)
+    assert s._db.execute("SELECT COUNT(*) FROM tat").fetchone()[0] == 0
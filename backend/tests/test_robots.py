@@ -0,0 +1,97 @@
+import asyncio
+
+import httpx
+import pytest
+
+import robots
+from robots import Rules, parse
+
+
+def test_longest_match_wins():
+    r = Rules([("/books/", False), ("/books/public/", True)])
+    assert not r.allowed("/books/secret")
+    assert r.allowed("/books/public/x")
+    assert r.allowed("/other")
+
+
+def test_allow_wins_a_tie():
+    assert Rules([("/page", False), ("/page", True)]).allowed("/page")
+    assert Rules([("/page", True), ("/page", False)]).allowed("/page")
+    # same length, one of them a pattern
+    assert Rules([("/a*c", False), ("/abc", True)]).allowed("/abc")
+
+
+def test_dollar_anchors_the_end():
+    r = Rules([("/*.pdf$", False)])
+    assert not r.allowed("/files/book.pdf")
+    assert r.allowed("/files/book.pdf?download=1")
+    assert r.allowed("/files/book.pdfx")
+
+
+def test_wildcard_matches_any_run():
+    r = Rules([("/", True), ("/*?s=", False)])
+    assert not r.allowed("/search/?s=x")
+    assert not r.allowed("/?s=x")
+    assert r.allowed("/search/")
+
+
+def test_pattern_beats_shorter_prefix():
+    r = Rules([("/wp-admin/", False), ("/wp-admin/*.php$", True)])
+    assert r.allowed("/wp-admin/admin-ajax.php")
+    assert not r.allowed("/wp-admin/options")
+
+
+def test_empty_rules_allow_everything():
+    assert Rules([]).allowed("/anything")
+    assert parse("User-agent: *\nDisallow:\n").allowed("/x")
+
+
+def test_own_group_wins_over_star():
+    text = "User-agent: *\nDisallow: /\n\nUser-agent: ElmafdeinBot\nDisallow: /private\nCrawl-delay: 4\n"
+    r = parse(text, "elmafdeinbot")
+    assert r.allowed("/books/")
+    assert not r.allowed("/private/x")
+    assert r.crawl_delay == 4.0
+
+
+def test_group_is_matched_on_the_whole_token():
+    text = "User-agent: bot\nDisallow: /\n\nUser-agent: *\nDisallow: /x\n"
+    r = parse(text, "elmafdeinbot")
+    assert r.allowed("/books/")
+    assert not r.allowed("/x")
+
+
+def test_grouped_user_agents_share_rules():
+    text = "User-agent: other\nUser-agent: elmafdeinbot\nDisallow: /a\n\nUser-agent: *\nDisallow: /\n"
+    r = parse(text, "elmafdeinbot")
+    assert not r.allowed("/a")
+    assert r.allowed("/b")
+
+
+def _serve(monkeypatch, status: int, body: str = ""):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        return httpx.Response(status, text=body)
+
+    monkeypatch.setattr(robots, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(robots, "_CACHE", {})
+    return calls
+
+
+@pytest.mark.parametrize("status", [404, 500])
+def test_missing_or_failing_robots_allows_all(monkeypatch, status):
+    _serve(monkeypatch, status)
+    assert asyncio.run(robots.is_allowed("https://example.com", "/x"))
+
+
+def test_rules_are_fetched_once_and_cached(monkeypatch):
+    calls = _serve(monkeypatch, 200, "User-agent: *\nDisallow: /x\n")
+
+    async def go():
+        return await asyncio.gather(*(robots.is_allowed("https://example.com/", "/x") for _ in range(5)))
+
+    assert asyncio.run(go()) == [False] * 5
+    assert asyncio.run(robots.is_allowed("https://example.com", "/y"))
+    assert calls == ["https://example.com/robots.txt"]
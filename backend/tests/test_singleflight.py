@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+import singleflight
+
+
+def test_concurrent_callers_share_one_run():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "books"
+
+    async def main():
+        return await asyncio.gather(*(singleflight.do("k", work) for _ in range(3)))
+
+    assert asyncio.run(main()) == [("books", False), ("books", True), ("books", True)]
+    assert calls == [1]
+    assert singleflight.inflight() == 0
+
+
+def test_finished_key_runs_again():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        return await singleflight.do("k", work), await singleflight.do("k", work)
+
+    assert asyncio.run(main()) == ((1, False), (2, False))
+
+
+def test_different_keys_do_not_share():
+    async def work():
+        await asyncio.sleep(0.01)
+        return "x"
+
+    async def main():
+        return await asyncio.gather(singleflight.do("a", work), singleflight.do("b", work))
+
+    assert asyncio.run(main()) == [("x", False), ("x", False)]
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_run():
+    async def work():
+        await asyncio.sleep(0.05)
+        return "books"
+
+    async def main():
+        first = asyncio.ensure_future(singleflight.do("k", work))
+        second = asyncio.ensure_future(singleflight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()  # e.g. the client disconnected
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == ("books", True)
+    assert singleflight.inflight() == 0
+
+
+def test_error_reaches_every_caller_and_clears_the_key():
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(*(singleflight.do("k", work) for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert singleflight.inflight() == 0
@@ -0,0 +1,45 @@
+import pytest
+
+from textnorm import annotate, normalize, tokenize
+
+
+@pytest.mark.parametrize(
+    "raw, folded",
+    [
+        ("أنبا", "انبا"),
+        ("إيمان", "ايمان"),
+        ("آباء", "اباء"),
+        ("ٱلله", "الله"),
+        ("مؤمن", "مومن"),
+        ("رئيس", "رييس"),
+        ("كنيسة", "كنيسه"),
+        ("مَتَّى", "متي"),  # tashkeel dropped, alef maqsura folded
+        ("الـــكتاب", "الكتاب"),  # tatweel
+        ("١٩٥٠ ۱۲", "1950 12"),  # Arabic-Indic and extended digits
+        ("ﻻ", "لا"),  # presentation form, via NFKC
+        ("  Saint\tMARK \n", "saint mark"),
+        ("Straße", "strasse"),  # casefold, not lower
+    ],
+)
+def test_normalize_folds(raw, folded):
+    assert normalize(raw) == folded
+
+
+def test_normalize_empty():
+    assert normalize("") == ""
+    assert normalize(None) == ""
+
+
+def test_diacritics_only_normalize_to_empty():
+    assert normalize("ًٌٍ") == ""
+
+
+def test_tokenize_splits_on_non_word_characters():
+    assert tokenize("تفسير إنجيل متى - Vol.2") == ["تفسير", "انجيل", "متي", "vol", "2"]
+
+
+def test_annotate_adds_match_fields_in_place():
+    rec = {"title": "القدّيس أثناسيوس", "author": None}
+    assert annotate(rec) is rec
+    assert rec["title_norm"] == "القديس اثناسيوس"
+    assert rec["author_norm"] == ""
@@ -0,0 +1,45 @@
+"""Arabic-aware text normalization for search matching.
+
+Applied once when records are ingested (title_norm / author_norm fields) and
+once per query, so matching is a plain substring/token test afterwards:
+ - NFKC (folds Arabic presentation forms) + casefold
+ - strip tashkeel diacritics, superscript alef and tatweel
+ - hamza forms أ إ آ ٱ -> ا, ؤ -> و, ئ -> ي
+ - ta marbuta ة -> ه, alef maqsura ى -> ي
+ - Arabic-Indic digits -> ASCII, whitespace collapsed
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Any, Dict, List
+
+_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_SPACES = re.compile(r"\s+")
+_TOKENS = re.compile(r"\w+")
+_FOLD = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و", "ئ": "ي",
+    "ة": "ه", "ى": "ي",
+    **{chr(0x0660 + d): str(d) for d in range(10)},
+    **{chr(0x06F0 + d): str(d) for d in range(10)},
+})
+
+
+def normalize(text: str) -> str:
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _DIACRITICS.sub("", text).translate(_FOLD)
+    return _SPACES.sub(" ", text).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKENS.findall(normalize(text))
+
+
+def annotate(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Add title_norm / author_norm to a book record in place."""
+    record["title_norm"] = normalize(record.get("title") or "")
+    record["author_norm"] = normalize(record.get("author") or "")
+    return record
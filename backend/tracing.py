@@ -0,0 +1,195 @@
+"""Lightweight request tracing with OpenTelemetry-compatible output.
+
+Key design:
+ - trace(name) opens a root span for one request; span(name) opens a child
+   of whatever span is current (contextvar), so tasks started inside a
+   request (site scrapers, detail workers) nest under it automatically
+ - With no active trace, span() is a no-op: tracing costs nothing unless a
+   request asked for it (debug=timings) or an exporter is configured
+ - Finished traces are exported as OTLP/JSON (resourceSpans) to
+     TRACE_FILE           one JSON document per line, appended
+     TRACE_OTLP_ENDPOINT  POSTed to a collector, e.g. http://localhost:4318/v1/traces
+ - breakdown() gives the inline form returned by ?debug=timings
+ - Spans started after their trace finished (e.g. a background refresh that
+   outlives the request) are dropped
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "elmafdein-library-api")
+
+log = logging.getLogger("uvicorn.error")
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attrs", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attrs = dict(attrs)
+        self.error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class Trace:
+    def __init__(self, name: str):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self.finished = False
+        self.name = name
+
+
+_CURRENT: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trace_span", default=None)
+
+
+def enabled() -> bool:
+    return bool(TRACE_FILE or TRACE_OTLP_ENDPOINT)
+
+
+def current() -> Optional[Span]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def _open(trace: Trace, name: str, parent_id: Optional[str], attrs: Dict[str, Any]) -> Iterator[Span]:
+    sp = Span(trace, name, parent_id, attrs)
+    trace.spans.append(sp)
+    token = _CURRENT.set(sp)
+    try:
+        yield sp
+    except BaseException as e:
+        sp.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        sp.end_ns = time.time_ns()
+        _CURRENT.reset(token)
+
+
+@contextmanager
+def trace(name: str, force: bool = False, **attrs: Any) -> Iterator[Optional[Trace]]:
+    """Root span for one request; recorded if `force` or an exporter is set."""
+    if not (force or enabled()):
+        yield None
+        return
+    tr = Trace(name)
+    try:
+        with _open(tr, name, None, attrs):
+            yield tr
+    finally:
+        tr.finished = True
+        if enabled():
+            export(tr)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """Child of the current span; no-op outside a recorded trace."""
+    parent = _CURRENT.get()
+    if parent is None or parent.trace.finished:
+        yield None
+        return
+    with _open(parent.trace, name, parent.span_id, attrs) as sp:
+        yield sp
+
+
+def _attr(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        v = {"boolValue": value}
+    elif isinstance(value, int):
+        v = {"intValue": str(value)}
+    elif isinstance(value, float):
+        v = {"doubleValue": value}
+    else:
+        v = {"stringValue": str(value)}
+    return {"key": key, "value": v}
+
+
+def to_otlp(tr: Trace) -> Dict[str, Any]:
+    spans = []
+    for sp in tr.spans:
+        spans.append({
+            "traceId": tr.trace_id,
+            "spanId": sp.span_id,
+            **({"parentSpanId": sp.parent_id} if sp.parent_id else {}),
+            "name": sp.name,
+            "kind": 2 if sp.parent_id is None else 1,  # SERVER root, INTERNAL children
+            "startTimeUnixNano": str(sp.start_ns),
+            "endTimeUnixNano": str(sp.end_ns or time.time_ns()),
+            "attributes": [_attr(k, v) for k, v in sp.attrs.items() if v is not None],
+            "status": {"code": 2, "message": sp.error} if sp.error else {"code": 1},
+        })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attr("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "elmafdein.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+async def _post(doc: Dict[str, Any]) -> None:
+    import httpx
+
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            await client.post(TRACE_OTLP_ENDPOINT, json=doc)
+    except Exception as e:
+        log.debug("TRACE: export to collector failed %s", e)
+
+
+_PENDING: set = set()
+
+
+def export(tr: Trace) -> None:
+    doc = to_otlp(tr)
+    if TRACE_FILE:
+        try:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+        except OSError as e:
+            log.warning("TRACE: write failed %s", e)
+    if TRACE_OTLP_ENDPOINT:
+        try:
+            task = asyncio.get_running_loop().create_task(_post(doc))
+        except RuntimeError:
+            return
+        _PENDING.add(task)
+        task.add_done_callback(_PENDING.discard)
+
+
+def breakdown(tr: Optional[Trace]) -> Optional[Dict[str, Any]]:
+    """Inline span list: offsets/durations in ms relative to the root span."""
+    if tr is None or not tr.spans:
+        return None
+    root = tr.spans[0]
+    now = time.time_ns()
+    spans = []
+    for sp in tr.spans:
+        end = sp.end_ns or now
+        spans.append({
+            "name": sp.name,
+            "span_id": sp.span_id,
+            "parent_id": sp.parent_id,
+            "start_ms": round((sp.start_ns - root.start_ns) / 1e6, 1),
+            "duration_ms": round((end - sp.start_ns) / 1e6, 1),
+            **({"attrs": sp.attrs} if sp.attrs else {}),
+            **({"error": sp.error} if sp.error else {}),
+        })
+    return {"trace_id": tr.trace_id, "total_ms": round(((root.end_ns or now) - root.start_ns) / 1e6, 1), "spans": spans}
@@ -17,10 +17,17 @@ from typing import List, Dict, Optional
 import asyncio
 import json
 import os
+import sys
 import time
 from pathlib import Path
 import logging
 
+# Shared Arabic-aware normalization lives in backend/textnorm.py
+_BACKEND_DIR = str(Path(__file__).resolve().parent.parent / "backend")
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+from textnorm import annotate, normalize
+
 from orthodox_scraper import OrthodoxBookScraper
 
 # Configure logging
@@ -72,14 +79,31 @@ class SearchResponse(BaseModel):
     cached: bool
     timestamp: float
 
+# (path, mtime) -> annotated books, so normalization runs once per file version
+_BOOKS_MEMO: Dict[tuple, List[Dict]] = {}
+
+def _annotate_books(books: List[Dict]) -> List[Dict]:
+    """Precompute title_norm/author_norm once at ingest"""
+    for book in books:
+        if "title_norm" not in book:
+            annotate(book)
+    return books
+
+def _load_books_file(path: str) -> List[Dict]:
+    key = (path, os.path.getmtime(path))
+    if key not in _BOOKS_MEMO:
+        with open(path, 'r', encoding='utf-8') as f:
+            _BOOKS_MEMO.clear()
+            _BOOKS_MEMO[key] = _annotate_books(json.load(f))
+    return _BOOKS_MEMO[key]
+
 def load_cache() -> Optional[Dict]:
     """Load cached book data"""
     try:
         # First try to load the sample data for better user experience
         sample_file = "sample_books.json"
         if os.path.exists(sample_file):
-            with open(sample_file, 'r', encoding='utf-8') as f:
-                sample_books = json.load(f)
+            sample_books = _load_books_file(sample_file)
             
             cache_data = {
                 "books": sample_books,
@@ -95,6 +119,7 @@ def load_cache() -> Optional[Dict]:
         if os.path.exists(CACHE_FILE):
             with open(CACHE_FILE, 'r', encoding='utf-8') as f:
                 cache_data = json.load(f)
+            _annotate_books(cache_data.get("books", []))
                 
             # Check if cache is still valid
             if time.time() - cache_data.get("timestamp", 0) < CACHE_DURATION:
@@ -112,7 +137,7 @@ def save_cache(books: List[Dict], search_query: str = ""):
     """Save books to cache"""
     try:
         cache_data = {
-            "books": books,
+            "books": _annotate_books(books),
             "search_query": search_query,
             "timestamp": time.time(),
             "total_count": len(books)
@@ -131,15 +156,15 @@ def filter_books(books: List[Dict], keyword: str) -> List[Dict]:
     if not keyword:
         return books
     
-    keyword_lower = keyword.lower()
+    keyword_norm = normalize(keyword)
+    if not keyword_norm:
+        # e.g. diacritics only: matches nothing rather than every book
+        return []
     filtered = []
     
     for book in books:
-        # Search in title and author
-        title = book.get("title", "").lower()
-        author = book.get("author", "").lower()
-        
-        if keyword_lower in title or keyword_lower in author:
+        # Search in precomputed normalized title and author
+        if keyword_norm in book.get("title_norm", "") or keyword_norm in book.get("author_norm", ""):
             filtered.append(book)
     
     return filtered
@@ -191,13 +216,7 @@ async def search_books(
         
         # Filter by search query if provided
         if q:
-            filtered_books = []
-            search_term = q.lower()
-            for book in all_books:
-                if (search_term in book.get("title", "").lower() or 
-                    search_term in book.get("author", "").lower()):
-                    filtered_books.append(book)
-            all_books = filtered_books
+            all_books = filter_books(all_books, q)
         
         duration = time.time() - start_time
         logger.info(f"✅ Search completed in {duration:.2f}s, found {len(all_books)} books")
@@ -254,7 +273,7 @@ async def refresh_cache(background_tasks: BackgroundTasks):
     async def refresh_books():
         try:
             logger.info("🔄 Starting background cache refresh...")
-            books = await scraper.search_books()
+            books = await scraper.search_books(incremental=True)
             save_cache(books)
             logger.info(f"✅ Cache refreshed with {len(books)} books")
         except Exception as e:
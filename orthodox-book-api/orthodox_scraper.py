@@ -24,7 +24,6 @@ import argparse
 import os
 import sys
 import time
-import random
 from urllib.parse import urljoin, urlparse, parse_qs
 from pathlib import Path
 from typing import List, Dict, Optional, Any
@@ -34,6 +33,16 @@ from playwright.async_api import async_playwright, Page, Browser
 from fake_useragent import UserAgent
 import requests
 
+# Shared crawl-state helper lives in backend/crawl_state.py
+_BACKEND_DIR = str(Path(__file__).resolve().parent.parent / "backend")
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+from crawl_state import CrawlState
+import hostrate
+import robots
+
+hostrate.set_delay_source(robots.crawl_delay)
+
 # Configure logging with proper encoding for Windows
 logging.basicConfig(
     level=logging.INFO,
@@ -54,6 +63,7 @@ class OrthodoxBookScraper:
         self.ua = UserAgent()
         self.downloads_dir = Path("downloads")
         self.downloads_dir.mkdir(exist_ok=True)
+        self.crawl_states: Dict[str, CrawlState] = {}
         
         # Sacred site configurations
         self.sites = {
@@ -92,11 +102,12 @@ class OrthodoxBookScraper:
         except:
             return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     
-    async def sacred_delay(self):
-        """Sacred pause between requests to avoid detection"""
-        delay = random.uniform(*self.delay_range)
-        logger.info(f"🙏 Sacred pause for {delay:.2f} seconds...")
-        await asyncio.sleep(delay)
+    async def sacred_delay(self, url: str):
+        """Sacred pause: wait for this host's turn in the shared per-host scheduler
+        (at least delay_range[0] between requests, longer if robots Crawl-delay says so)"""
+        waited = await hostrate.acquire(url, min_interval=self.delay_range[0])
+        if waited:
+            logger.info(f"🙏 Sacred pause for {waited:.2f} seconds...")
     
     async def setup_page(self, page: Page) -> None:
         """Configure page with anti-detection measures"""
@@ -279,10 +290,26 @@ class OrthodoxBookScraper:
         
         return text.strip()
     
-    async def search_site(self, browser: Browser, site_name: str, keyword: str = "") -> List[Dict]:
-        """Search a specific site for books"""
+    def crawl_state(self, site_name: str) -> CrawlState:
+        """Remembered details URLs of a site, for incremental full-listing crawls"""
+        if site_name not in self.crawl_states:
+            self.crawl_states[site_name] = CrawlState(f"crawl_state_{site_name}.json")
+        return self.crawl_states[site_name]
+    
+    async def search_site(self, browser: Browser, site_name: str, keyword: str = "", incremental: bool = False) -> List[Dict]:
+        """Search a specific site for books
+        
+        With incremental=True and no keyword, pagination stops at the first
+        page whose books are all known from earlier runs (unless a periodic
+        full re-verification is due) and the remembered books are appended.
+        """
         site_config = self.sites[site_name]
         books = []
+        state = self.crawl_state(site_name) if not keyword else None
+        full = state is None or not incremental or state.full_due()
+        # "complete": reached the end of the listing, "capped": stopped at
+        # max_pages; anything else means the pass was cut short
+        outcome = "partial"
         
         try:
             page = await browser.new_page()
@@ -304,17 +331,23 @@ class OrthodoxBookScraper:
                     logger.info(f"📄 Scraping page {page_num} from {site_name}")
                     
                     # Navigate to page
+                    await self.sacred_delay(search_url)
                     await page.goto(search_url, wait_until='domcontentloaded', timeout=30000)
-                    await self.sacred_delay()
                     
                     # Extract books from current page
                     page_books = await self.extract_book_data(page, site_config, site_name)
                     
                     if not page_books:
                         logger.info(f"⚠️ No books found on page {page_num}, stopping pagination")
+                        if page_num > 1:  # followed a next link past the last page
+                            outcome = "complete"
                         break
                     
+                    page_known = state is not None and state.all_known(b.get("details_url") for b in page_books)
                     books.extend(page_books)
+                    if not full and page_known:
+                        logger.info(f"✅ Page {page_num} of {site_name} only has known books, stopping incremental crawl")
+                        break
                     
                     # Look for next page link
                     next_selectors = site_config["selectors"]["next_page"].split(", ")
@@ -333,6 +366,12 @@ class OrthodoxBookScraper:
                     
                     if not next_url:
                         logger.info(f"✅ No more pages found for {site_name}")
+                        outcome = "complete"
+                        break
+                    
+                    if page_num == max_pages:
+                        logger.info(f"📄 Reached page limit ({max_pages}) for {site_name}")
+                        outcome = "capped"
                         break
                     
                     search_url = next_url
@@ -348,10 +387,35 @@ class OrthodoxBookScraper:
         except Exception as e:
             logger.error(f"❌ Fatal error scraping {site_name}: {e}")
         
+        if state is not None:
+            books = self.merge_crawl_state(state, books, outcome if full else "partial")
         return books
     
-    async def search_books(self, keyword: str = "", sites: List[str] = None) -> List[Dict]:
-        """Search for books across all configured sites"""
+    def merge_crawl_state(self, state: CrawlState, books: List[Dict], outcome: str) -> List[Dict]:
+        """Record this run's books and return them plus remembered ones
+
+        Only a "complete" full pass forgets unlisted URLs; a "capped" one
+        (stopped at max_pages) counts as re-verified but keeps them.
+        """
+        seen = {b["details_url"]: b for b in books if b.get("details_url")}
+        if outcome == "complete":
+            state.replace_all(seen)
+        else:
+            for url, book in seen.items():
+                state.remember(url, book)
+            if outcome == "capped":
+                state.mark_full()
+        try:
+            state.save()
+        except OSError as e:
+            logger.warning(f"⚠️ Could not save crawl state: {e}")
+        return books + [b for url, b in state.items.items() if url not in seen]
+    
+    async def search_books(self, keyword: str = "", sites: List[str] = None, incremental: bool = False) -> List[Dict]:
+        """Search for books across all configured sites
+        
+        incremental only applies to keyword-less (full listing) crawls.
+        """
         if sites is None:
             sites = list(self.sites.keys())
         
@@ -376,7 +440,7 @@ class OrthodoxBookScraper:
                 tasks = []
                 for site_name in sites:
                     if site_name in self.sites:
-                        task = self.search_site(browser, site_name, keyword)
+                        task = self.search_site(browser, site_name, keyword, incremental=incremental)
                         tasks.append(task)
                 
                 # Execute searches concurrently
@@ -390,6 +454,9 @@ class OrthodoxBookScraper:
                 
             finally:
                 await browser.close()
+                # the robots.txt client is bound to this event loop; it is
+                # recreated on the next search
+                await robots.close()
         
         # Remove duplicates based on title and source
         unique_books = []
@@ -487,6 +554,12 @@ async def main():
         help="Run browser in visible mode for debugging"
     )
     
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help="Stop at already-known listing pages (full listing crawls only)"
+    )
+    
     parser.add_argument(
         '--output', '-o',
         type=str,
@@ -507,7 +580,7 @@ async def main():
     
     try:
         # Search for books
-        books = await scraper.search_books(keyword=args.keyword, sites=sites)
+        books = await scraper.search_books(keyword=args.keyword, sites=sites, incremental=args.incremental)
         
         if not books:
             print("❌ No books found matching your criteria")